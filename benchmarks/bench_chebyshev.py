@@ -0,0 +1,62 @@
+"""
+Compare Chebyshev orbit interpolation with the exact broadcast propagation.
+
+Every satellite of brdc1810.09n is evaluated on a dense epoch grid over
+the whole day with the two propagation paths of keplerian4coor
+(gnss.cache.satellite_states and gnss.chebyshev.interpolated_states).
+The script reports throughput and the position/clock error of the
+interpolation, and exits with status 1 when the error exceeds the bound
+in gnss.chebyshev.
+
+Usage (from the repository root):
+    python benchmarks/bench_chebyshev.py [--interval 1] [--repeat 3] [--segment 1800] [--degree 10]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bench_nav_parse import DATA_DIR, best_time
+from gnss import chebyshev
+from gnss.cache import satellite_states
+from gnss.ephemeris import EphemerisArray
+from gnss.ephemeris_index import EphemerisIndex
+from gnss.rinex_nav import read_nav
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interval', type=float, default=1.0, help="Epoch spacing [s]")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--segment', type=float, default=chebyshev.SEGMENT_SECONDS)
+    parser.add_argument('--degree', type=int, default=chebyshev.DEGREE)
+    args = parser.parse_args()
+
+    ephemerides = EphemerisArray.from_table(read_nav(os.path.join(DATA_DIR, 'brdc1810.09n')))
+    index = EphemerisIndex(ephemerides)
+    day = np.floor(ephemerides.toe.min() / 86400) * 86400
+    times = day + np.arange(0, 86400, args.interval)
+    rows = index.lookup(index.prns[None, :], times[:, None])
+    t = np.broadcast_to(times[:, None], rows.shape)[rows >= 0]
+    rows = rows[rows >= 0]
+
+    # Propagation stage of keplerian4coor in both modes
+    t_exact, _ = best_time(lambda: satellite_states(ephemerides, rows, t), args.repeat)
+    t_cheb, _ = best_time(lambda: chebyshev.interpolated_states(ephemerides, rows, t, args.segment, args.degree),
+                          args.repeat)
+    print(f"exact        {t_exact * 1e3:9.1f} ms  {len(t) / t_exact:12.0f} states/s")
+    print(f"chebyshev    {t_cheb * 1e3:9.1f} ms  {len(t) / t_cheb:12.0f} states/s  "
+          f"speedup {t_exact / t_cheb:5.2f}x  (segment {args.segment:.0f} s, degree {args.degree})")
+
+    report = chebyshev.accuracy(ephemerides, rows, t, args.segment, args.degree)
+    print(f"max position error {report['max_position_error'] * 1e3:.3f} mm  "
+          f"RMS {report['rms_position_error'] * 1e3:.3f} mm  max clock error {report['max_clock_error']:.1e} s  "
+          f"(bound {chebyshev.POSITION_TOLERANCE * 1e3:.1f} mm / {chebyshev.CLOCK_TOLERANCE:.0e} s: "
+          f"{'ok' if report['within_tolerance'] else 'EXCEEDED'})")
+    sys.exit(0 if report['within_tolerance'] else 1)
+
+
+if __name__ == "__main__":
+    main()
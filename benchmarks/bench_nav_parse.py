@@ -0,0 +1,79 @@
+"""
+Compare the regex and fixed-width RINEX navigation parsers.
+
+Usage (from the repository root):
+    python benchmarks/bench_nav_parse.py [--repeat 5] [--scale 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gnss.rinex_nav import read_nav
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+NAV_FILES = ['brdc1810.09n', 'GPS_nav_3.02.rnx']
+
+
+def replicate(file, scale, output_file, chunk_size=1 << 20):
+    """
+    Write a copy of a RINEX file whose body is repeated `scale` times.
+
+    The body is streamed from the source once per copy, so memory use does
+    not grow with `scale`.
+    """
+    with open(file, 'r') as src, open(output_file, 'w') as dst:
+        while True:
+            line = src.readline()
+            dst.write(line)
+            if not line or 'END OF HEADER' in line:
+                break
+        body_start = src.tell()
+        for _ in range(scale):
+            src.seek(body_start)
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                dst.write(chunk)
+
+
+def best_time(func, repeat):
+    """
+    Return the best wall-clock time of `repeat` calls and the last result.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=20, help="Body replication factor for the synthetic file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in NAV_FILES:
+            source = os.path.join(DATA_DIR, name)
+            synthetic = os.path.join(tmp, f'x{args.scale}_{name}')
+            replicate(source, args.scale, synthetic)
+
+            for label, path in [(name, source), (f'{name} x{args.scale}', synthetic)]:
+                t_regex, regex_table = best_time(lambda: read_nav(path, method='regex'), args.repeat)
+                t_fixed, fixed_table = best_time(lambda: read_nav(path, method='fixed'), args.repeat)
+                columns = regex_table.columns.drop(['Satellite', 'Epoch Time'])
+                max_diff = np.nanmax(np.abs(regex_table[columns].to_numpy() - fixed_table[columns].to_numpy()))
+                print(f"{label:28s} {len(fixed_table):6d} records  regex {t_regex * 1e3:8.2f} ms  "
+                      f"fixed {t_fixed * 1e3:8.2f} ms  speedup {t_regex / t_fixed:5.1f}x  max diff {max_diff:.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare propagation from raw ephemeris fields with propagation from prepared ephemerides.
+
+Two workloads over every healthy ephemeris of brdc1810.09n:
+  epochs  one call per epoch, all satellites at that epoch (streaming pattern)
+  batch   one call for a whole day of (satellite, epoch) pairs
+
+The raw path derives the epoch-independent constants on every call; the
+prepared path derives them once with gnss.orbit.prepare.
+
+Usage (from the repository root):
+    python benchmarks/bench_prepared.py [--repeat 5] [--interval 30]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bench_nav_parse import DATA_DIR, best_time
+from gnss.ephemeris import EphemerisArray
+from gnss.ephemeris_index import EphemerisIndex
+from gnss.orbit import propagate, satellite_clock
+from gnss.rinex_nav import read_nav
+
+
+def _states(eph, t):
+    X, Y, Z = propagate(eph, t)
+    return np.stack([X, Y, Z, satellite_clock(eph, t)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--interval', type=float, default=30.0, help="Epoch spacing [s]")
+    args = parser.parse_args()
+
+    ephemerides = EphemerisArray.from_table(read_nav(os.path.join(DATA_DIR, 'brdc1810.09n')))
+    index = EphemerisIndex(ephemerides)
+    start = np.floor(ephemerides.toe.min() / 86400) * 86400
+    times = start + np.arange(0, 86400, args.interval)
+
+    # Ephemeris row of every (epoch, satellite) pair
+    rows = index.lookup(index.prns[None, :], times[:, None])
+    valid = rows >= 0
+    t = np.broadcast_to(times[:, None], rows.shape)[valid]
+    pairs = rows[valid]
+    per_epoch = [rows[i][valid[i]] for i in range(len(times))]
+
+    raw = ephemerides.data
+    prepared = ephemerides.prepare()
+
+    results = {}
+    for label, source in [('raw', raw), ('prepared', prepared)]:
+        t_epochs, _ = best_time(lambda: [_states(source[r], times[i]) for i, r in enumerate(per_epoch)],
+                                args.repeat)
+        t_batch, states = best_time(lambda: _states(source[pairs], t), args.repeat)
+        results[label] = (t_epochs, t_batch, states)
+        print(f"{label:9s} epochs {t_epochs * 1e3:9.2f} ms ({len(times)} calls)  "
+              f"batch {t_batch * 1e3:8.2f} ms ({len(pairs)} pairs)")
+
+    (raw_epochs, raw_batch, raw_states), (prep_epochs, prep_batch, prep_states) = results['raw'], results['prepared']
+    max_diff = np.max(np.abs(raw_states[:3] - prep_states[:3]))
+    print(f"speedup   epochs {raw_epochs / prep_epochs:5.2f}x  batch {raw_batch / prep_batch:5.2f}x  "
+          f"max position diff {max_diff:.1e} m")
+
+
+if __name__ == "__main__":
+    main()
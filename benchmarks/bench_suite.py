@@ -0,0 +1,218 @@
+"""
+Benchmark the parsers, the propagator and the ENU transform on the bundled data.
+
+Every (case, scale) pair runs in its own subprocess so its peak RSS is
+measured in isolation.  Inputs are replicated to the requested scales and
+results are written as JSON for comparison across commits.
+
+Usage (from the repository root):
+    python benchmarks/bench_suite.py [--scales 1 10 100] [--repeat 3] [--output results.json]
+    python benchmarks/bench_suite.py --compare old.json new.json
+"""
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, '..')
+sys.path.append(ROOT)
+sys.path.append(BENCH_DIR)
+from bench_nav_parse import DATA_DIR, best_time, replicate
+
+# Input file of each file-based case
+CASE_FILES = {
+    'nav_v2': 'brdc1810.09n',
+    'nav_v3': 'GPS_nav_3.02.rnx',
+    'obs_v2': 'roap1810.09o',
+    'obs_v3': 'GPS_obs_3_02.rnx',
+}
+CASES = list(CASE_FILES) + ['propagate', 'enu']
+
+# Propagation grid at scale 1: every satellite of brdc1810.09n every 5 minutes for a day
+EPOCH_INTERVAL = 300.0
+
+# Station network used by the ENU case (lat, lon in degrees, height in m)
+STATIONS = [(21.0285, 105.8542, 10), (10.7769, 106.7009, 5), (16.0544, 108.2022, 8),
+            (35.6762, 139.6503, 40), (1.3521, 103.8198, 15), (-33.8688, 151.2093, 30),
+            (51.4779, -0.0015, 46), (40.7128, -74.0060, 10)]
+
+
+def _load_calc_module(name):
+    """
+    Import one of the calc/ scripts as a module.
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, 'calc', f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _positions(scale):
+    """
+    Build the propagation workload: (nav table, observation frame) at the given scale.
+    """
+    from gnss.rinex_nav import read_nav
+
+    nav_table = read_nav(os.path.join(DATA_DIR, CASE_FILES['nav_v2']))
+    prns = np.unique(nav_table['Satellite'].to_numpy(dtype=str))
+    start = nav_table['Epoch Time'].min().normalize()
+    num_epochs = int(86400 / EPOCH_INTERVAL) * scale
+    times = start + pd.to_timedelta(np.arange(num_epochs) * EPOCH_INTERVAL / scale, unit='s')
+    obs_df = pd.DataFrame({
+        'Satellite': np.repeat(prns[None, :], num_epochs, axis=0).ravel(),
+        'Epoch Time': np.repeat(times.to_numpy(), len(prns)),
+    })
+    return nav_table, obs_df
+
+
+def run_case(case, scale, repeat, input_file=None):
+    """
+    Time one case in the current process.
+
+    Returns:
+        dict: Timing, throughput and peak RSS
+    """
+    from gnss.geodesy import ecef_to_enu, geodetic_to_ecef
+    from gnss.rinex_nav import read_nav
+    from gnss.rinex_obs import read_epochs
+
+    input_bytes = os.path.getsize(input_file) if input_file else 0
+    if case.startswith('nav'):
+        seconds, table = best_time(lambda: read_nav(input_file), repeat)
+        items = len(table)
+    elif case.startswith('obs'):
+        seconds, items = best_time(lambda: sum(len(e.prns) for e in read_epochs(input_file)), repeat)
+    elif case == 'propagate':
+        keplerian4coor = _load_calc_module('calc_coor_gps').keplerian4coor
+        nav_table, obs_df = _positions(scale)
+        seconds, results = best_time(lambda: keplerian4coor(nav_table, obs_df), repeat)
+        items = len(results)
+    elif case == 'enu':
+        from gnss.cache import satellite_states
+        from gnss.ephemeris_index import EphemerisIndex
+        from gnss.orbit import gps_seconds
+
+        nav_table, obs_df = _positions(scale)
+        t = gps_seconds(obs_df['Epoch Time'])
+        rows = EphemerisIndex(nav_table).lookup(obs_df['Satellite'].to_numpy(dtype=str), t)
+        X, Y, Z, _ = satellite_states(nav_table, rows[rows >= 0], t[rows >= 0])
+        positions = np.stack([X, Y, Z], axis=-1)
+        lat, lon, h = np.array(STATIONS).T
+        stations = np.stack(geodetic_to_ecef(lat, lon, h), axis=-1)
+        seconds, _ = best_time(lambda: ecef_to_enu(positions, stations), repeat)
+        items = len(positions) * len(stations)
+    else:
+        raise ValueError(f"Unknown case: {case}")
+
+    return {
+        'case': case,
+        'scale': scale,
+        'input_bytes': input_bytes,
+        'items': items,
+        'seconds': seconds,
+        'items_per_s': items / seconds,
+        'mb_per_s': input_bytes / 1e6 / seconds if input_bytes else None,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KiB on Linux
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(cases, scales, repeat):
+    """
+    Run every (case, scale) pair in a fresh subprocess and collect the results.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for case in cases:
+            for scale in scales:
+                command = [sys.executable, os.path.abspath(__file__), '--run-case', case,
+                           '--scale', str(scale), '--repeat', str(repeat)]
+                if case in CASE_FILES:
+                    source = os.path.join(DATA_DIR, CASE_FILES[case])
+                    input_file = source
+                    if scale > 1:
+                        input_file = os.path.join(tmp, f'x{scale}_{CASE_FILES[case]}')
+                        replicate(source, scale, input_file)
+                    command += ['--input', input_file]
+                output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                results.append(result)
+                print(f"{case:10s} x{scale:<4d} {result['items']:10d} items  {result['seconds'] * 1e3:10.2f} ms  "
+                      f"{result['items_per_s']:12.0f} items/s  peak RSS {result['peak_rss_mb']:7.1f} MB")
+                if case in CASE_FILES and scale > 1:
+                    os.remove(input_file)
+    return results
+
+
+def compare(old_file, new_file):
+    """
+    Print the throughput ratio of two result files, case by case.
+    """
+    with open(old_file) as f:
+        old = {(r['case'], r['scale']): r for r in json.load(f)['results']}
+    with open(new_file) as f:
+        new = json.load(f)['results']
+    for r in new:
+        before = old.get((r['case'], r['scale']))
+        if before is None:
+            continue
+        ratio = r['items_per_s'] / before['items_per_s']
+        print(f"{r['case']:10s} x{r['scale']:<4d} {before['items_per_s']:12.0f} -> {r['items_per_s']:12.0f} items/s "
+              f"({ratio:5.2f}x)  peak RSS {before['peak_rss_mb']:7.1f} -> {r['peak_rss_mb']:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', default=CASES, choices=CASES)
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help="Results file (default: bench_<commit>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    parser.add_argument('--scale', type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument('--input', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        # Child process: run one case and report it as the last line of stdout
+        print(json.dumps(run_case(args.run_case, args.scale, args.repeat, args.input)))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = _git_commit()
+    report = {
+        'commit': commit,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': run_suite(args.cases, args.scales, args.repeat),
+    }
+    output = args.output or f'bench_{commit or "local"}.json'
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
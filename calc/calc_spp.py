@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gnss.ephemeris import EphemerisArray
+from gnss.ephemeris_index import EphemerisIndex
+from gnss.instrument import Instrument, stage
+from gnss.obs_cube import build_cube
+from gnss.rinex_nav import read_nav
+from gnss.spp import solve_cube
+
+# Input and output file paths
+obs_file = "../data/GPS_obs_3_02.rnx"
+nav_file = "../data/GPS_nav_3.02.rnx"
+cube_dir = "../data/GPS_obs_3_02.cube"
+output_csv = "spp_output.csv"
+
+# Carrier-smooth C1C with L1C over this many epochs (gnss.hatch); None uses the raw code
+HATCH_WINDOW = None
+
+def solution_table(solution):
+    """
+    Flatten an SPP solution to one row per epoch.
+
+    Args:
+        solution (SppSolution): Result of gnss.spp.solve
+
+    Returns:
+        pd.DataFrame: Epoch Time, X, Y, Z, clock bias [m], number of satellites, RMS residual and DOPs
+    """
+    rms = np.sqrt(np.nansum(solution.residuals**2, axis=1) / np.maximum(solution.num_sats, 1))
+    table = pd.DataFrame({
+        'Epoch Time': solution.time,
+        'X': solution.position[:, 0],
+        'Y': solution.position[:, 1],
+        'Z': solution.position[:, 2],
+        'Clock': solution.clock,
+        'NumSats': solution.num_sats,
+        'RMS': np.where(solution.valid, rms, np.nan),
+    })
+    for k, v in solution.dop.items():
+        table[k] = v
+    return table
+
+# Main execution
+def main():
+    cube = build_cube(obs_file, cube_dir)
+    nav_table = EphemerisArray.from_table(read_nav(nav_file))
+    index = EphemerisIndex(nav_table)
+
+    start = time.perf_counter()
+    with stage('solve'):
+        solution = solve_cube(cube, nav_table, 'C1C', index, hatch_window=HATCH_WINDOW)
+    elapsed = time.perf_counter() - start
+    print(f"Solved {solution.valid.sum()}/{len(solution.time)} epochs in {elapsed * 1e3:.1f} ms "
+          f"({len(solution.time) / elapsed:.0f} epochs/s)")
+
+    # Compare with the approximate position from the observation header
+    approx = np.array(cube.meta['position'])
+    mean = np.nanmean(solution.position, axis=0)
+    print(f"Mean position: {mean.round(3).tolist()}")
+    print(f"Offset from APPROX POSITION XYZ: {np.linalg.norm(mean - approx):.2f} m "
+          f"(std {np.nanstd(solution.position, axis=0).round(2).tolist()} m)")
+    print(f"Mean PDOP {np.nanmean(solution.dop['PDOP']):.2f}, HDOP {np.nanmean(solution.dop['HDOP']):.2f}, "
+          f"VDOP {np.nanmean(solution.dop['VDOP']):.2f}")
+
+    with stage('write'):
+        solution_table(solution).to_csv(output_csv, index=False)
+    print(f"Data saved to {output_csv}")
+
+if __name__ == "__main__":
+    with Instrument('calc_spp') as instrument:
+        main()
+    print(instrument.summary())
@@ -1,68 +1,27 @@
-import re
-import pandas as pd
+import os
+import sys
 import json
-from datetime import datetime
 
-def extract_numbers(line):
-    """
-    Extract numerical values from a given line using regular expression.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gnss.rinex_nav import read_nav_tables
+
+def read_rinex_body(file, select=None):
     """
-    return re.findall(r'[-+]?\d*\.\d+E[+-]\d+|[-+]?\d+', line.replace('D', 'E'))
+    Read the RINEX 3.02 navigation message file and extract navigation data for every constellation.
 
-def _obstime(fol):
-    return datetime(year=int(fol[0]), month=int(fol[1]), day=int(fol[2]),
-                    hour=int(fol[3]), minute=int(fol[4]),
-                    second=int(float(fol[5])))
+    Args:
+        file (str): Path to the RINEX 3 navigation file
+        select (callable, optional): Predicate on the PRN ('G05', 'J07', 'E11', ...), applied at read time
 
-def read_rinex_body(file):
-    """
-    Read the RINEX 3.02 navigation message file and extract navigation data for QZSS satellites.
+    Returns:
+        list: One dict per ephemeris with 'Satellite', 'Epoch Time' and the fields of its system's layout
     """
-    fields = [
-        'SVclockBias', 'SVclockDrift', 'SVclockDriftRate', 'IODE', 'Crs', 'DeltaN', 'M0',
-        'Cuc', 'Eccentricity', 'Cus', 'sqrtA', 'Toe', 'Cic', 'Omega0', 'Cis',
-        'Io', 'Crc', 'omega', 'OmegaDot', 'IDOT', 'CodesL2', 'GPSWeek', 'L2Pflag',
-        'SVacc', 'health', 'TGD', 'IODC', 'TransTime', 'FitIntvl'
-    ]
-    
     nav_data = []
-    with open(file, 'r', encoding='utf-8') as f:
-        # Skip header
-        for line in f:
-            if "END OF HEADER" in line:
-                break
-        
-        # Process navigation data
-        for line in f:
-            prn_str = line[:3].strip()
-            
-            # Parse datetime and PRN
-            dt = _obstime([line[4:8], line[9:11], line[12:14], line[15:17], line[18:20], line[21:23]])
-            prn = f'G{prn_str[1:]}'
-            
-            if prn != "G05":
-                continue
-            
-            # Collect raw data across multiple lines
-            raw_data = [line[23:].strip()]
-            for _ in range(7):
-                extra_line = f.readline()
-                if not extra_line:
-                    break
-                raw_data.append(extra_line.strip())
-            
-            # Extract numerical values
-            raw_values = extract_numbers(" ".join(raw_data))
-            
-            # Ensure correct field-value mapping
-            entry = {"Satellite": prn, "Epoch Time": dt.strftime('%Y-%m-%d %H:%M:%S')}
-            for k, v in zip(fields, raw_values):
-                try:
-                    entry[k] = float(v)
-                except ValueError:
-                    entry[k] = None
-            nav_data.append(entry)
-    
+    for system, table in read_nav_tables(file, select).items():
+        table = table.reset_index(drop=True)
+        table['Epoch Time'] = table['Epoch Time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        table = table.astype(object).where(table.notna(), None)
+        nav_data.extend(table.to_dict('records'))
     return nav_data
 
 def save_to_json(data, output_file):
@@ -78,5 +37,6 @@ rinex_file = "../data/GPS_nav_3.02.rnx"
 output_json = "gps_output_2.json"
 
 # Run extraction
-nav_data = read_rinex_body(rinex_file)
-save_to_json(nav_data, output_json)
+if __name__ == "__main__":
+    nav_data = read_rinex_body(rinex_file)
+    save_to_json(nav_data, output_json)
@@ -0,0 +1,3 @@
+"""
+GNSS processing library shared by the scripts in calc/ and plot/.
+"""
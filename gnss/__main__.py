@@ -0,0 +1,5 @@
+import sys
+
+from gnss.cli import main
+
+sys.exit(main())
@@ -0,0 +1,198 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from gnss.ephemeris import EphemerisArray
+from gnss.instrument import count, stage
+from gnss.orbit import propagate, propagate_state, satellite_clock
+
+# Ephemeris columns needed to propagate positions and clock offsets
+STATE_FIELDS = ['sqrtA', 'Eccentricity', 'M0', 'DeltaN', 'omega', 'Cus', 'Cuc', 'Crc', 'Crs',
+                'Io', 'IDOT', 'Cic', 'Cis', 'Omega0', 'OmegaDot', 'Toe', 'GPSWeek',
+                'SVclockBias', 'SVclockDrift', 'SVclockDriftRate']
+
+# Bumped whenever the propagation code changes, so stale disk entries are never returned
+CACHE_VERSION = 4
+
+# Default bounds: entries kept in memory and bytes kept on disk
+MAX_ENTRIES = 128
+MAX_DISK_BYTES = 256 * 2**20
+
+
+def gather(table, rows):
+    """
+    Gather the ephemerides of a batch of table rows.
+
+    Args:
+        table (EphemerisArray or pd.DataFrame): Ephemerides; a DataFrame is
+            converted on every call, so convert it once when calling in a loop
+        rows (array_like): Row positions into the table (for .iloc)
+
+    Returns:
+        EphemerisArray: Contiguous ephemerides, one per row
+    """
+    return EphemerisArray.from_table(table).take(rows)
+
+
+def satellite_states(table, rows, t):
+    """
+    Propagate satellite positions and clock offsets without caching.
+
+    Args:
+        table (EphemerisArray or pd.DataFrame): Ephemerides
+        rows (array_like): Row positions into the table, one per time
+        t (array_like): GPS time in seconds since the GPS epoch
+
+    Returns:
+        tuple: (X, Y, Z) ECEF [m] and the satellite clock offset [s] (TGD not applied)
+    """
+    with stage('propagate'):
+        eph = EphemerisArray.from_table(table).prepare()[np.asarray(rows, dtype=np.int64)]
+        X, Y, Z = propagate(eph, t)
+        return X, Y, Z, satellite_clock(eph, t)
+
+
+def satellite_motion(table, rows, t):
+    """
+    Propagate satellite positions, velocities, clock offsets and drifts without caching.
+
+    Args:
+        table (EphemerisArray or pd.DataFrame): Ephemerides
+        rows (array_like): Row positions into the table, one per time
+        t (array_like): GPS time in seconds since the GPS epoch
+
+    Returns:
+        SatelliteState: (X, Y, Z) [m], (VX, VY, VZ) [m/s], clock offset [s] and drift [s/s]
+    """
+    with stage('propagate'):
+        eph = EphemerisArray.from_table(table).prepare()[np.asarray(rows, dtype=np.int64)]
+        return propagate_state(eph, t)
+
+
+class PositionCache:
+    """
+    Size-bounded LRU cache of propagated satellite positions and clock offsets.
+
+    Entries are keyed by a digest of the ephemerides used (satellite, Toe,
+    IODE and every orbit/clock field) and of the epoch grid, so any change
+    in either produces a new key.  The most recently used entries are kept
+    in memory; with a directory, every entry is also written as an .npz file
+    so later runs over the same day are served from disk.
+    """
+
+    def __init__(self, directory=None, max_entries=MAX_ENTRIES, max_disk_bytes=MAX_DISK_BYTES):
+        """
+        Args:
+            directory (str, optional): On-disk cache directory (memory only when None)
+            max_entries (int): Entries kept in memory
+            max_disk_bytes (int): Size limit of the on-disk cache
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, table, rows, t, method='exact'):
+        """
+        Digest of the ephemeris identity, epoch grid and propagation method of a request.
+        """
+        eph = gather(table, rows)
+        digest = hashlib.blake2b(f'{CACHE_VERSION}:{method}'.encode(), digest_size=20)
+        digest.update(eph.data['Satellite'].tobytes())
+        for k in ['Toc', 'IODE'] + STATE_FIELDS:
+            digest.update(np.ascontiguousarray(eph[k]).tobytes())
+        digest.update(np.ascontiguousarray(t, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, key):
+        """
+        Return the cached tuple of state arrays for a key, or None.
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.directory and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as data:
+                value = tuple(data[f'arr_{i}'] for i in range(len(data.files)))
+            os.utime(self._path(key))  # Mark as recently used for disk eviction
+            self._remember(key, value)
+            return value
+        return None
+
+    def put(self, key, value):
+        """
+        Store a tuple of state arrays under a key, evicting least recently used entries.
+        """
+        self._remember(key, value)
+        if self.directory:
+            np.savez(self._path(key), *value)
+            self._evict_disk()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """
+        Delete the least recently used files until the directory fits max_disk_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def clear(self):
+        """
+        Drop every entry, in memory and on disk.
+        """
+        self._memory.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith('.npz'):
+                    os.remove(os.path.join(self.directory, name))
+
+    def states(self, table, rows, t, compute=satellite_states):
+        """
+        Cached version of satellite_states.
+
+        Args:
+            table (EphemerisArray or pd.DataFrame): Ephemerides
+            rows (array_like): Row positions into the table, one per time
+            t (array_like): GPS time in seconds since the GPS epoch
+            compute (callable): Uncached implementation with the same signature
+                (e.g. gnss.chebyshev.interpolated_states or satellite_motion); part of the key
+
+        Returns:
+            tuple: Output of compute; by default (X, Y, Z) ECEF [m] and the
+                satellite clock offset [s] (TGD not applied)
+        """
+        table = EphemerisArray.from_table(table)
+        key = self.key(table, rows, t, compute.__name__)
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            count('cache hits')
+            return value
+        self.misses += 1
+        count('cache misses')
+        value = compute(table, rows, t)
+        self.put(key, value)
+        return value
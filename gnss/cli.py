@@ -0,0 +1,334 @@
+"""
+Command line entry point: ``python -m gnss <command> ...``.
+
+Commands chain in memory: ``position`` parses both files and solves
+without intermediate files, ``orbit`` and ``plot`` propagate straight
+from the parsed navigation file.  Every command imports its modules when
+it runs, so ``parse-nav`` starts without loading matplotlib or xarray.
+
+    python -m gnss parse-nav data/brdc1810.09n -o nav.npz
+    python -m gnss parse-obs data/GPS_obs_3_02.rnx -o obs.cube --prn G05
+    python -m gnss orbit --nav data/brdc1810.09n --interval 300 -o orbits.parquet
+    python -m gnss visibility --nav data/brdc1810.09n --mask 10 -o passes.csv
+    python -m gnss position --obs data/GPS_obs_3_02.rnx --nav data/GPS_nav_3.02.rnx -o spp.csv --hatch 100
+    python -m gnss plot sky --nav data/brdc1810.09n --mask 10 -o sky.png
+
+The existing tools are available as ``ingest``, ``follow`` and ``stream``.
+"""
+import argparse
+import sys
+import time
+
+# Epoch spacing of the orbit grid when no observation file is given [s]
+DEFAULT_INTERVAL = 300.0
+
+
+def _select(prns):
+    """
+    PRN predicate for the readers (None keeps every satellite).
+    """
+    if not prns:
+        return None
+    prns = set(prns)
+    return lambda prn: prn in prns
+
+
+def _read_nav(args):
+    from gnss.ephemeris import EphemerisArray
+    from gnss.rinex_nav import read_nav
+
+    return EphemerisArray.from_table(read_nav(args.nav, select=_select(args.prn)))
+
+
+def _visibility(ephemerides, index, station, t, mask):
+    """
+    Visibility index of an ECEF station over the span of the epochs t [GPS seconds].
+    """
+    import numpy as np
+
+    from gnss.visibility import STEP_SECONDS, VisibilityIndex
+
+    start = np.floor(t.min() / STEP_SECONDS) * STEP_SECONDS
+    return VisibilityIndex(ephemerides, station, start, t.max() - start, mask=mask, index=index)
+
+
+def _orbit_table(args):
+    """
+    Satellite states on the observation epochs or a regular grid, as a column dict.
+    """
+    import numpy as np
+
+    from gnss.cache import satellite_motion, satellite_states
+    from gnss.chebyshev import interpolated_states
+    from gnss.ephemeris_index import EphemerisIndex
+    from gnss.rinex_obs import read_epochs
+
+    ephemerides = _read_nav(args)
+    index = EphemerisIndex(ephemerides)
+    if getattr(args, 'obs', None):
+        epochs = list(read_epochs(args.obs, select=_select(args.prn)))
+        prns = np.concatenate([e.prns for e in epochs])
+        times = np.concatenate([np.full(len(e.prns), e.time, dtype='datetime64[ns]') for e in epochs])
+    else:
+        start = np.floor(ephemerides.toe.min() / 86400) * 86400
+        grid = start + np.arange(0, 86400, args.interval)
+        prns = np.tile(index.prns, len(grid))
+        times = (np.datetime64('1980-01-06', 'ns')
+                 + (np.repeat(grid, len(index.prns)) * 1e9).astype('timedelta64[ns]'))
+
+    t = (times - np.datetime64('1980-01-06', 'ns')).astype(np.int64) / 1e9
+    rows = index.lookup(prns, t)
+    valid = rows >= 0
+    if args.mask is not None:
+        # Propagate only what the station sees
+        from gnss.geodesy import geodetic_to_ecef
+
+        visibility = _visibility(ephemerides, index, geodetic_to_ecef(*args.station), t, args.mask)
+        valid &= visibility.visible(prns, t)
+    if args.velocity:
+        compute = satellite_motion
+    else:
+        compute = interpolated_states if args.interpolate else satellite_states
+    state = compute(ephemerides, rows[valid], t[valid])
+
+    columns = {'Satellite': prns[valid], 'Epoch Time': times[valid]}
+    names = ['X', 'Y', 'Z', 'VX', 'VY', 'VZ', 'Clock', 'ClockDrift'] if args.velocity else ['X', 'Y', 'Z', 'Clock']
+    columns.update(zip(names, state))
+    return columns
+
+
+def cmd_parse_nav(args):
+    from gnss.rinex_nav import read_nav
+    from gnss.writers import write_table
+
+    table = read_nav(args.nav, method=args.method, select=_select(args.prn))
+    rows = write_table(args.output, table)
+    print(f"{args.nav}: {rows} ephemerides of {table['Satellite'].nunique()} satellites -> {args.output}")
+
+
+def cmd_parse_obs(args):
+    import numpy as np
+
+    from gnss.obs_cube import build_cube
+    from gnss.rinex_obs import read_epochs, read_header
+    from gnss.writers import BatchWriter
+
+    if args.output.rstrip('/').endswith('.cube'):
+        cube = build_cube(args.obs, args.output, args.types, _select(args.prn))
+        print(f"{args.obs}: {cube.shape[0]} epochs x {cube.shape[1]} satellites x {cube.shape[2]} types "
+              f"-> {args.output}")
+        return
+
+    with open(args.obs, 'r') as f:
+        obs_types = args.types or read_header(f)['obs_types']
+    with BatchWriter(args.output) as writer:
+        for epoch in read_epochs(args.obs, obs_types, _select(args.prn)):
+            columns = {'Satellite': epoch.prns, 'Epoch Time': np.full(len(epoch.prns), epoch.time)}
+            columns.update(zip(obs_types, epoch.obs.T))
+            writer.write(columns)
+    print(f"{args.obs}: {writer.rows} observations -> {args.output}")
+
+
+def cmd_orbit(args):
+    from gnss.writers import write_table
+
+    rows = write_table(args.output, _orbit_table(args))
+    print(f"{rows} satellite states -> {args.output}")
+
+
+def cmd_visibility(args):
+    import pandas as pd
+
+    from gnss.geodesy import geodetic_to_ecef
+    from gnss.visibility import VisibilityIndex
+    from gnss.writers import write_table
+
+    visibility = VisibilityIndex(_read_nav(args), geodetic_to_ecef(*args.station), step=args.step, mask=args.mask)
+    if args.save:
+        visibility.save(args.save)
+    passes = visibility.intervals()
+    if args.output:
+        write_table(args.output, passes)
+        print(f"{len(passes['Satellite'])} passes -> {args.output}")
+    else:
+        print(pd.DataFrame(passes).to_string(index=False))
+
+
+def cmd_position(args):
+    import numpy as np
+
+    from gnss import hatch
+    from gnss.ephemeris_index import EphemerisIndex
+    from gnss.orbit import gps_seconds
+    from gnss.rinex_obs import iter_epochs, read_header
+    from gnss.spp import solve_epochs
+    from gnss.writers import write_table
+
+    ephemerides = _read_nav(args)
+    with open(args.obs, 'r') as f:
+        header = read_header(f)
+        obs_type = args.type or ('C1C' if header.get('version', 2) >= 3 else 'C1')
+        obs_types = [obs_type, hatch.phase_type(obs_type)] if args.hatch else [obs_type]
+        epochs = list(iter_epochs(f, header, obs_types, _select(args.prn)))
+
+    index = EphemerisIndex(ephemerides)
+    visibility = None
+    if args.mask is not None:
+        if not header.get('position'):
+            raise SystemExit(f"{args.obs}: --mask needs APPROX POSITION XYZ in the header")
+        times = np.array([e.time for e in epochs], dtype='datetime64[ns]')
+        visibility = _visibility(ephemerides, index, header['position'], gps_seconds(times), args.mask)
+
+    start = time.perf_counter()
+    solution = solve_epochs(epochs, ephemerides, index, header.get('position'), hatch_window=args.hatch,
+                            visibility=visibility)
+    elapsed = time.perf_counter() - start
+    smoothed = f" (Hatch window {args.hatch})" if args.hatch else ""
+    print(f"Solved {solution.valid.sum()}/{len(solution.time)} epochs with {obs_type}{smoothed} "
+          f"in {elapsed * 1e3:.1f} ms")
+
+    columns = {
+        'Epoch Time': solution.time,
+        'X': solution.position[:, 0],
+        'Y': solution.position[:, 1],
+        'Z': solution.position[:, 2],
+        'Clock': solution.clock,
+        'NumSats': solution.num_sats,
+        'RMS': np.where(solution.valid, np.sqrt(np.nansum(solution.residuals**2, axis=1)
+                                                / np.maximum(solution.num_sats, 1)), np.nan),
+    }
+    columns.update(solution.dop)
+    if args.output:
+        write_table(args.output, columns)
+        print(f"Solutions -> {args.output}")
+    print(f"Mean position: {np.nanmean(solution.position, axis=0).round(3).tolist()}")
+
+
+def cmd_plot(args):
+    import numpy as np
+
+    from gnss import plots
+    from gnss.writers import read_table
+
+    if args.positions:
+        table = read_table(args.positions)
+        xyz = [k for k in ('X', 'Y', 'Z') if k in table] or ['x', 'y', 'z']
+        positions, satellites = table[xyz].to_numpy(), table['Satellite'].astype(str).to_numpy()
+        if args.mask is not None:
+            from gnss.geodesy import geodetic_to_ecef
+            from gnss.visibility import above_mask
+
+            visible = above_mask(positions, geodetic_to_ecef(*args.station), args.mask)
+            positions, satellites = positions[visible], satellites[visible]
+        satellites = satellites.tolist()
+    else:
+        columns = _orbit_table(args)
+        positions = np.stack([columns['X'], columns['Y'], columns['Z']], axis=-1)
+        satellites = columns['Satellite'].tolist()
+
+    import matplotlib
+    matplotlib.use('Agg')
+    if args.kind == 'ecef':
+        fig = plots.ecef_figure(positions, satellites)
+    else:
+        fig = plots.FIGURES[args.kind](positions, satellites, tuple(args.station))
+    plots.save_figure(fig, args.output)
+    print(f"{args.kind} plot of {len(positions)} positions -> {args.output}")
+
+
+# Existing tools run through their own main() with the remaining arguments
+DELEGATES = {
+    'ingest': ('gnss.ingest', "Parse many RINEX files concurrently"),
+    'follow': ('gnss.follow', "Incrementally parse a growing RINEX file"),
+    'stream': ('gnss.stream', "Streaming positioning service"),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='gnss', description="GNSS processing pipeline",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def nav_options(p, required=True):
+        p.add_argument('--nav', required=required, help="RINEX navigation file")
+        p.add_argument('--prn', nargs='+', help="Only these satellites (e.g. G05 G12)")
+
+    def orbit_options(p):
+        p.add_argument('--obs', help="Propagate to the epochs of this observation file")
+        p.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                       help=f"Grid spacing over the navigation day without --obs (default {DEFAULT_INTERVAL:.0f} s)")
+        p.add_argument('--interpolate', action='store_true', help="Chebyshev interpolation (dense grids)")
+        p.add_argument('--velocity', action='store_true', help="Add velocity and clock drift")
+        p.add_argument('--station', nargs=3, type=float, default=[21.0285, 105.8542, 10],
+                       metavar=('LAT', 'LON', 'H'), help="Station for --mask and enu/sky plots (default: Hanoi)")
+        p.add_argument('--mask', type=float, metavar='DEG',
+                       help="Only satellites above this elevation at --station (e.g. 10)")
+
+    p = commands.add_parser('parse-nav', help="Parse a navigation file into a table")
+    p.add_argument('nav', help="RINEX 2/3 navigation file")
+    p.add_argument('-o', '--output', required=True, help="Output table (.npz, .parquet, .arrow, .csv, .json)")
+    p.add_argument('--method', choices=['fixed', 'regex'], default='fixed')
+    p.add_argument('--prn', nargs='+', help="Only these satellites")
+    p.set_defaults(func=cmd_parse_nav)
+
+    p = commands.add_parser('parse-obs', help="Parse an observation file into a cube or table")
+    p.add_argument('obs', help="RINEX 2/3 observation file")
+    p.add_argument('-o', '--output', required=True, help="Cube directory (*.cube) or output table")
+    p.add_argument('--types', nargs='+', help="Observation types (default: all in the header)")
+    p.add_argument('--prn', nargs='+', help="Only these satellites")
+    p.set_defaults(func=cmd_parse_obs)
+
+    p = commands.add_parser('orbit', help="Satellite positions from broadcast ephemerides")
+    nav_options(p)
+    orbit_options(p)
+    p.add_argument('-o', '--output', required=True, help="Output table")
+    p.set_defaults(func=cmd_orbit)
+
+    p = commands.add_parser('visibility', help="Rise/set times of every satellite pass over a station")
+    nav_options(p)
+    p.add_argument('--station', nargs=3, type=float, default=[21.0285, 105.8542, 10],
+                   metavar=('LAT', 'LON', 'H'), help="Station (default: Hanoi)")
+    p.add_argument('--mask', type=float, default=10.0, metavar='DEG', help="Elevation mask (default 10)")
+    p.add_argument('--step', type=float, default=60.0, help="Elevation grid spacing [s] (default 60)")
+    p.add_argument('--save', help="Also store the index (.npz) for gnss.visibility.VisibilityIndex.load")
+    p.add_argument('-o', '--output', help="Output table of passes (default: print)")
+    p.set_defaults(func=cmd_visibility)
+
+    p = commands.add_parser('position', help="Single-point positioning from code pseudoranges")
+    p.add_argument('--obs', required=True, help="RINEX observation file")
+    nav_options(p)
+    p.add_argument('--type', help="Pseudorange observation (default: C1C for RINEX 3, C1 for RINEX 2)")
+    p.add_argument('--hatch', type=int, metavar='WINDOW',
+                   help="Carrier-smooth the pseudoranges over WINDOW samples (e.g. 100)")
+    p.add_argument('--mask', type=float, metavar='DEG',
+                   help="Elevation mask at the header's approximate position (e.g. 10)")
+    p.add_argument('-o', '--output', help="Output table of per-epoch solutions")
+    p.set_defaults(func=cmd_position)
+
+    p = commands.add_parser('plot', help="ECEF, ENU or sky plot of satellite positions")
+    p.add_argument('kind', choices=['ecef', 'enu', 'sky'])
+    nav_options(p, required=False)
+    orbit_options(p)
+    p.add_argument('--positions', help="Table with Satellite and X/Y/Z (or x/y/z) columns instead of --nav")
+    p.add_argument('-o', '--output', required=True, help="Output image")
+    p.set_defaults(func=cmd_plot)
+
+    for name, (_, help) in DELEGATES.items():
+        commands.add_parser(name, help=help, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in DELEGATES:
+        import importlib
+
+        return importlib.import_module(DELEGATES[argv[0]][0]).main(argv[1:]) or 0
+    args = build_parser().parse_args(argv)
+    if args.command == 'plot' and not (args.nav or args.positions):
+        build_parser().error("plot needs --nav or --positions")
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
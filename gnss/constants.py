@@ -0,0 +1,27 @@
+import numpy as np
+
+# Earth gravitational constant - same for GPS and QZSS
+GM = 3.986004418e14  # [m^3 s^-2]
+
+# Earth rotation rate - same for GPS and QZSS
+OMEGA_E = 7.292115e-5  # [rad s^-1]
+
+# WGS-84 ellipsoid: semi-major axis and first eccentricity squared
+WGS84_A = 6378137.0  # [m]
+WGS84_E2 = 6.69437999014e-3
+
+# Speed of light in m/s
+C = 299792458.0
+
+# Relativistic clock correction constant F = -2*sqrt(GM)/C^2 (IS-GPS-200)
+F_REL = -4.442807633e-10  # [s m^-1/2]
+
+# GNSS epoch start (6/1/1980)
+GPS_EPOCH = np.datetime64('1980-01-06T00:00:00', 'ns')
+
+SECONDS_PER_WEEK = 604800
+HALF_WEEK = 302400
+
+# GPS/QZSS L1 carrier frequency and wavelength
+L1_FREQUENCY = 1575.42e6  # [Hz]
+L1_WAVELENGTH = C / L1_FREQUENCY  # [m]
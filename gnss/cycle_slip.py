@@ -0,0 +1,225 @@
+"""
+Cycle-slip detection and carrier-phase arc segmentation.
+
+Works on whole-file [epoch x satellite] code and phase arrays (an
+observation cube's ``obs_slice('C1C')`` / ``obs_slice('L1C')``, or
+gnss.rinex_obs.stack_epochs).  Every sample is compared with the previous
+sample of the same satellite through index arrays, so there is no loop
+over epochs or satellites:
+
+* a data gap is a spacing above ``max_gap`` between two samples;
+* a cycle slip shows as a spike in the time-differenced phase, measured
+  against the mean phase rate of the neighbouring samples, or as a step in
+  code-minus-carrier (CMC).
+
+Receiver clock jumps move every satellite together, so both tests remove
+the per-epoch median over the satellites first.  An arc is a run of
+samples of one satellite without gap or slip.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from gnss.constants import L1_WAVELENGTH
+from gnss.instrument import count, stage
+
+# Phase spike threshold [cycles] plus a dynamic term for the satellite's
+# line-of-sight jerk over the sample spacing: negligible at 1 Hz, where
+# every slip of one cycle or more is caught, but about 4 cycles at 30 s,
+# where single-frequency data cannot resolve smaller slips
+PHASE_THRESHOLD = 0.5  # [cycles]
+MAX_JERK = 5e-5  # [m s^-3]
+
+# Epoch-to-epoch CMC step threshold; code noise and ionosphere stay
+# below ~3 m at 1 Hz and ~10 m at 30 s
+CMC_THRESHOLD = 15.0  # [m]
+
+# Default gap: any missed epoch, i.e. 1.5 times the nominal interval
+GAP_FACTOR = 1.5
+
+# Satellites needed in an epoch before its median is removed as receiver clock
+MIN_COMMON_MODE = 3
+
+SlipDetection = namedtuple('SlipDetection', ['cmc', 'phase_rate', 'slip', 'gap', 'arc',
+                                             'arc_satellite', 'arc_start', 'arc_end'])
+SlipDetection.__doc__ = """
+Per-sample results, shape [E, S]:
+    cmc: code minus carrier [m] (NaN where code or phase is missing)
+    phase_rate: time-differenced phase over the previous sample [m/s] (NaN across gaps)
+    slip: cycle slip between the previous sample and this one
+    gap: data gap before this sample
+    arc: arc number of the sample (-1 where it is missing)
+Per-arc results, shape [A], in arc number order:
+    arc_satellite: satellite column
+    arc_start, arc_end: first and last epoch index (inclusive)
+"""
+
+
+def _seconds(times):
+    """
+    Epoch times as float seconds from the first epoch.
+    """
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        if len(times) == 0:
+            return np.empty(0)
+        return (times - times[0]).astype('timedelta64[ns]').astype(np.int64) / 1e9
+    return times.astype(np.float64)
+
+
+def _neighbours(valid):
+    """
+    Flat indices of the previous and the next valid sample of every [epoch, satellite] cell.
+
+    Returns:
+        tuple: Flat indices into an [E, S] array of the previous and next
+            sample (the cell itself where there is none), and boolean arrays
+            telling whether each exists, all shape [E, S]
+    """
+    E, S = valid.shape
+    epoch = np.arange(E, dtype=np.int32)[:, None]
+    last = np.maximum.accumulate(np.where(valid, epoch, -1), axis=0)
+    first = np.minimum.accumulate(np.where(valid, epoch, E)[::-1], axis=0)[::-1]
+    previous = np.full_like(last, -1)
+    following = np.full_like(first, E)
+    previous[1:] = last[:-1]
+    following[:-1] = first[1:]
+    has_previous, has_following = previous >= 0, following < E
+    column = np.arange(S, dtype=np.int32)
+    cell = epoch * S + column
+    return (np.where(has_previous, previous * S + column, cell), np.where(has_following, following * S + column, cell),
+            has_previous, has_following)
+
+
+def _remove_common_mode(values):
+    """
+    Subtract the per-epoch median over the satellites (receiver clock jumps).
+    """
+    # Median of the finite values of every row: NaNs sort to the end
+    ordered = np.sort(values, axis=1)
+    n = np.count_nonzero(np.isfinite(values), axis=1)
+    rows = np.arange(len(values))
+    lower, upper = np.maximum((n - 1) // 2, 0), n // 2
+    median = (ordered[rows, lower] + ordered[rows, np.minimum(upper, values.shape[1] - 1)]) / 2
+    return values - np.where(n >= MIN_COMMON_MODE, median, 0.0)[:, None]
+
+
+def detect(times, code, phase, max_gap=None, phase_threshold=PHASE_THRESHOLD, max_jerk=MAX_JERK,
+           cmc_threshold=CMC_THRESHOLD, wavelength=L1_WAVELENGTH):
+    """
+    Flag data gaps and cycle slips and split every satellite into continuous arcs.
+
+    Args:
+        times (array_like): Epoch times (datetime64 or seconds), shape [E]
+        code (array_like): Pseudorange [m], shape [E, S], NaN where missing
+        phase (array_like): Carrier phase [cycles], shape [E, S], NaN or 0 where missing
+        max_gap (float, optional): Largest sample spacing inside an arc [s]
+            (default: GAP_FACTOR times the median epoch spacing)
+        phase_threshold (float): Phase spike threshold [cycles]
+        max_jerk (float): Line-of-sight jerk allowed for in the phase test [m/s^3]
+        cmc_threshold (float): CMC step threshold [m]
+        wavelength (float): Carrier wavelength [m]
+
+    Returns:
+        SlipDetection
+    """
+    t = _seconds(times)
+    code = np.asarray(code, dtype=np.float64)
+    phase = np.asarray(phase, dtype=np.float64)
+    E, S = phase.shape
+    if max_gap is None:
+        max_gap = GAP_FACTOR * (np.median(np.diff(t)) if E > 1 else 0.0)
+
+    with stage('cycle slips'):
+        valid = np.isfinite(code) & np.isfinite(phase) & (phase != 0)
+        cmc = np.where(valid, code - wavelength * phase, np.nan)
+        previous, following, has_previous, has_following = _neighbours(valid)
+
+        def before(values):
+            return values.ravel()[previous]
+
+        def after(values):
+            return values.ravel()[following]
+
+        # Link every sample to the previous sample of its satellite
+        dt = np.where(valid & has_previous, t[:, None] - t[previous // S], np.nan)
+        gap = dt > max_gap
+        linked = dt <= max_gap
+        dphase = np.where(linked, phase - before(phase), np.nan)
+        rate = dphase / dt  # [cycles/s]
+
+        # CMC step: a slip of n cycles moves CMC by n wavelengths
+        dcmc = _remove_common_mode(np.where(linked, cmc - before(cmc), np.nan))
+
+        # Phase spike: compare the phase difference with the mean rate of the
+        # differences on either side (needs linked samples both sides)
+        centred = linked & before(linked) & has_following & after(linked)
+        expected = dt * (before(rate) + after(rate)) / 2
+        residual = np.abs(_remove_common_mode(np.where(centred, dphase - expected, np.nan)))
+        # A step of n cycles gives residuals -n/2, n, -n/2: flag only the peak
+        magnitude = np.nan_to_num(residual)
+        peak = (magnitude >= before(magnitude)) & (magnitude >= after(magnitude))
+        tolerance = phase_threshold + max_jerk * dt**3 / (2 * wavelength)
+
+        slip = linked & ((peak & (residual > tolerance)) | (np.abs(dcmc) > cmc_threshold))
+
+        # Arcs: a new one starts at the first sample, after a gap and at a slip
+        start = valid & (~linked | slip)
+        end = valid & (~has_following | after(start))
+        per_satellite = np.count_nonzero(start, axis=0)
+        offset = np.concatenate([[0], np.cumsum(per_satellite)[:-1]])
+        arc = np.where(valid, offset + np.cumsum(start, axis=0) - 1, -1)
+        arc_satellite, arc_start = np.nonzero(start.T)
+        arc_end = np.nonzero(end.T)[1]
+
+    count('slips', int(slip.sum()))
+    count('arcs', len(arc_start))
+    return SlipDetection(cmc, wavelength * rate, slip, gap, arc, arc_satellite, arc_start, arc_end)
+
+
+def detect_cube(cube, code_type='C1C', phase_type='L1C', **kwargs):
+    """
+    Run detect() over a whole observation cube (see gnss.obs_cube).
+
+    Args:
+        cube (ObsCube): Observation cube
+        code_type (str): Pseudorange observation ('C1C', or 'C1' for RINEX 2)
+        phase_type (str): Carrier phase observation ('L1C', or 'L1' for RINEX 2)
+        **kwargs: Passed to detect()
+
+    Returns:
+        SlipDetection
+    """
+    if 'max_gap' not in kwargs and cube.meta.get('interval'):
+        kwargs['max_gap'] = GAP_FACTOR * cube.meta['interval']
+    return detect(cube.times, cube.obs_slice(code_type), cube.obs_slice(phase_type), **kwargs)
+
+
+def arc_lengths(result):
+    """
+    Number of samples in every arc.
+    """
+    return np.bincount(result.arc[result.arc >= 0], minlength=len(result.arc_start))
+
+
+def arc_table(result, times, prns):
+    """
+    One row per arc, as a column dict for gnss.writers or pandas.
+
+    Args:
+        result (SlipDetection): Output of detect()
+        times (array_like): Epoch times, shape [E]
+        prns (array_like): Satellite of every column, shape [S]
+
+    Returns:
+        dict: Satellite, Start, End, Samples and whether the arc begins at a
+            Slip (otherwise at the first sample or after a gap)
+    """
+    times = np.asarray(times)
+    return {
+        'Satellite': np.asarray(prns)[result.arc_satellite],
+        'Start': times[result.arc_start],
+        'End': times[result.arc_end],
+        'Samples': arc_lengths(result),
+        'Slip': result.slip[result.arc_start, result.arc_satellite],
+    }
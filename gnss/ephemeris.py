@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from gnss.constants import SECONDS_PER_WEEK
+from gnss.nav_store import NAV_FIELDS, to_table
+from gnss.orbit import gps_seconds, prepare
+
+# Longest satellite ID stored: RINEX PRNs ('G05') and longer names ('QZSS01')
+SATELLITE_ID_LENGTH = 8
+
+# One contiguous record per ephemeris: satellite, clock reference time (Toc,
+# seconds since the GPS epoch) and every GPS/QZSS broadcast field as float64
+EPHEMERIS_DTYPE = np.dtype([('Satellite', f'U{SATELLITE_ID_LENGTH}'), ('Toc', 'f8')] +
+                           [(k, 'f8') for k in NAV_FIELDS])
+
+
+class Ephemeris:
+    """
+    Scalar view of one ephemeris record.
+
+    Fields are read as attributes (``eph.sqrtA``) or items (``eph['sqrtA']``),
+    so a single ephemeris can be passed to gnss.orbit.propagate directly.
+    """
+
+    __slots__ = ('_record',)
+
+    def __init__(self, record):
+        self._record = record
+
+    def __getattr__(self, name):
+        try:
+            return self._record[name]
+        except (KeyError, ValueError):
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name):
+        return self._record[name]
+
+    def __contains__(self, name):
+        return name in EPHEMERIS_DTYPE.names
+
+    @property
+    def toe(self):
+        """
+        Toe in seconds since the GPS epoch.
+        """
+        return self._record['GPSWeek'] * SECONDS_PER_WEEK + self._record['Toe']
+
+    def as_dict(self):
+        return {k: self._record[k].item() for k in EPHEMERIS_DTYPE.names}
+
+    def __repr__(self):
+        return f"Ephemeris({self._record['Satellite']}, toe={self.toe:.0f})"
+
+
+class EphemerisArray:
+    """
+    Contiguous array of ephemerides backed by a NumPy structured array.
+
+    ``arr['sqrtA']`` returns a field array without copying, ``arr[i]`` an
+    Ephemeris view and ``arr.take(rows)`` a new contiguous array, so
+    propagation code never goes through pandas.
+    """
+
+    __slots__ = ('data', '_prepared')
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=EPHEMERIS_DTYPE)
+        self._prepared = None
+
+    @classmethod
+    def from_table(cls, table):
+        """
+        Convert a wide ephemeris table (see gnss.nav_store.to_table).
+
+        Missing fields are filled with NaN.
+
+        Args:
+            table (pd.DataFrame): Wide ephemeris table
+
+        Returns:
+            EphemerisArray
+
+        Raises:
+            ValueError: A satellite ID is longer than SATELLITE_ID_LENGTH
+        """
+        if isinstance(table, cls):
+            return table
+        data = np.empty(len(table), dtype=EPHEMERIS_DTYPE)
+        if 'Satellite' in table:
+            satellite = table['Satellite'].to_numpy(dtype=str)
+            too_long = np.char.str_len(satellite) > SATELLITE_ID_LENGTH
+            if too_long.any():
+                raise ValueError(f"Satellite IDs longer than {SATELLITE_ID_LENGTH} characters: "
+                                 f"{sorted(set(satellite[too_long].tolist()))}")
+            data['Satellite'] = satellite
+        else:
+            data['Satellite'] = ''
+        data['Toc'] = gps_seconds(table['Epoch Time']) if 'Epoch Time' in table else np.nan
+        for k in NAV_FIELDS:
+            data[k] = table[k].to_numpy(dtype=np.float64) if k in table else np.nan
+        return cls(data)
+
+    def to_table(self):
+        """
+        Convert back to the wide ephemeris table.
+        """
+        columns = {k: self.data[k] for k in NAV_FIELDS}
+        columns['Satellite'] = self.data['Satellite']
+        columns['Epoch Time'] = pd.to_datetime(self.data['Toc'] * 1e9, unit='ns', origin='1980-01-06')
+        return to_table(columns)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, name):
+        return name in EPHEMERIS_DTYPE.names
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.data[key]
+        if isinstance(key, (int, np.integer)):
+            return Ephemeris(self.data[key])
+        return EphemerisArray(self.data[key])
+
+    def take(self, rows):
+        """
+        Gather ephemerides by row position into a new contiguous array.
+        """
+        return EphemerisArray(self.data[np.asarray(rows, dtype=np.int64)])
+
+    def prepare(self):
+        """
+        Propagation constants of every ephemeris (see gnss.orbit.prepare).
+
+        Computed on first use and kept with the array, so every later
+        propagation only gathers prepared rows.
+        """
+        if self._prepared is None:
+            self._prepared = prepare(self.data)
+        return self._prepared
+
+    @property
+    def toe(self):
+        """
+        Toe of every ephemeris in seconds since the GPS epoch.
+        """
+        return self.data['GPSWeek'] * SECONDS_PER_WEEK + self.data['Toe']
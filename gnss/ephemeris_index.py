@@ -0,0 +1,91 @@
+import numpy as np
+
+from gnss.constants import SECONDS_PER_WEEK
+
+# Curve-fit interval assumed when FitIntvl is zero (unknown) [hours]
+DEFAULT_FIT_INTERVAL = 4.0
+
+# Key spacing between satellites in the combined (PRN, toe) sort key.
+# GPS seconds stay well below 2**32 until 2116.
+_KEY_STRIDE = 2**32
+
+
+class EphemerisIndex:
+    """
+    Per-PRN sorted index over the Toe of every healthy ephemeris in a table.
+
+    All satellites share one sorted key array (PRN code * stride + toe), so
+    a whole day of (PRN, t) pairs is matched with a single searchsorted call.
+    """
+
+    def __init__(self, table):
+        """
+        Build the index from a wide ephemeris table.
+
+        Args:
+            table (pd.DataFrame or EphemerisArray): Wide ephemeris table (see gnss.nav_store.to_table)
+        """
+        satellite = np.asarray(table['Satellite'], dtype=str)
+        toe = np.asarray(table['GPSWeek'], dtype=np.float64) * SECONDS_PER_WEEK + np.asarray(table['Toe'], dtype=np.float64)
+        fit = np.asarray(table['FitIntvl'], dtype=np.float64)
+        fit = np.where(fit > 0, fit, DEFAULT_FIT_INTERVAL)
+        healthy = np.asarray(table['health'], dtype=np.float64) == 0
+
+        self.prns, codes = np.unique(satellite, return_inverse=True)
+        rows = np.flatnonzero(healthy)
+
+        # Sort by (PRN, toe, transmission time); for repeated uploads with the
+        # same toe keep only the most recently transmitted ephemeris.
+        order = np.lexsort((np.asarray(table['TransTime'])[rows], toe[rows], codes[rows]))
+        rows = rows[order]
+        keys = codes[rows].astype(np.int64) * _KEY_STRIDE + toe[rows].astype(np.int64)
+        last = np.append(keys[1:] != keys[:-1], True)[:len(keys)]
+
+        self.rows = rows[last]
+        self.keys = keys[last]
+        self.toe = toe[self.rows]
+        self.iode = np.asarray(table['IODE'], dtype=np.float64)[self.rows]
+        self.half_fit = fit[self.rows] * 3600 / 2
+        self.codes = codes[self.rows]
+
+    def _codes(self, prns):
+        """
+        Map PRN strings to integer codes (-1 for satellites not in the index).
+        """
+        prns = np.asarray(prns, dtype=str)
+        pos = np.minimum(np.searchsorted(self.prns, prns), len(self.prns) - 1)
+        return np.where(self.prns[pos] == prns, pos, -1)
+
+    def lookup(self, prns, t):
+        """
+        Find the best healthy ephemeris for each (PRN, t) pair.
+
+        The best ephemeris is the one whose Toe is nearest to t (the later one
+        on ties), provided t lies within half its fit interval of Toe.
+
+        Args:
+            prns (array_like): Satellite IDs ('G05', ...)
+            t (array_like): GPS time in seconds since the GPS epoch, broadcast against prns
+
+        Returns:
+            np.ndarray: Row positions into the table (for .iloc), -1 where no valid ephemeris exists
+        """
+        t = np.asarray(t, dtype=np.float64)
+        if len(self.keys) == 0:
+            return np.full(np.broadcast(np.asarray(prns), t).shape, -1, dtype=np.int64)
+        codes, t = np.broadcast_arrays(self._codes(prns), t)
+
+        # Candidates: last toe <= t and first toe > t for the same PRN
+        query = codes.astype(np.int64) * _KEY_STRIDE + np.floor(t).astype(np.int64)
+        after = np.searchsorted(self.keys, query, side='right')
+        before = after - 1
+        after = np.minimum(after, len(self.keys) - 1)
+        before = np.maximum(before, 0)
+
+        dt_before = np.where(self.codes[before] == codes, np.abs(t - self.toe[before]), np.inf)
+        dt_after = np.where(self.codes[after] == codes, np.abs(self.toe[after] - t), np.inf)
+        best = np.where(dt_after <= dt_before, after, before)
+        dt = np.minimum(dt_before, dt_after)
+
+        valid = (codes >= 0) & (dt <= self.half_fit[best])
+        return np.where(valid, self.rows[best], -1)
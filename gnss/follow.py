@@ -0,0 +1,252 @@
+"""
+Incrementally process a RINEX file that is still being written.
+
+Each run parses only the bytes appended since the previous run and adds
+them to a store directory as a new part file, next to a checkpoint with the
+byte offset reached and the header it belongs to.
+
+Usage:
+    python -m gnss.follow ../data/roap1810.09o -o roap_store [--interval 60]
+"""
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from gnss import rinex_nav, rinex_obs
+from gnss.ingest import save_epochs
+from gnss.nav_store import SYSTEM_FIELDS, load_table, save_table, to_table
+
+CHECKPOINT_FILE = 'checkpoint.json'
+_PART = 'part-{:05d}'
+
+# RINEX files are ASCII; latin-1 maps every byte to one character, so
+# character counts are byte offsets.
+_ENCODING = 'latin-1'
+
+
+def _read_header_bytes(file):
+    """
+    Return the raw header of a RINEX file, up to and including END OF HEADER.
+    """
+    header = []
+    with open(file, 'rb') as f:
+        for line in f:
+            header.append(line)
+            if b'END OF HEADER' in line:
+                return b''.join(header)
+    raise ValueError(f"{file}: END OF HEADER not found")
+
+
+def _obs_block_length(lines, i, header, lines_per_sat):
+    """
+    Number of lines of the observation block starting at lines[i] (1 for stray lines).
+    """
+    line = lines[i]
+    if header['version'] >= 3:
+        if not line.startswith('>'):
+            return 1
+        return 1 + int(line[32:35])
+    if len(line) < 32 or not line[29:32].strip():
+        return 1
+    flag = int(line[28]) if line[28].strip() else 0
+    num_of_sat = int(line[29:32])
+    if flag > 1 and flag != 6:
+        return 1 + num_of_sat
+    return -(-num_of_sat // 12) + num_of_sat * lines_per_sat
+
+
+def _nav_block_length(lines, i, header):
+    """
+    Number of lines of the navigation record starting at lines[i] (1 for stray lines).
+    """
+    line = lines[i]
+    system = line[:1] if header['version'] >= 3 else header['system']
+    if system not in SYSTEM_FIELDS or (header['version'] < 3 and not line[:2].strip().isdigit()):
+        return 1
+    fields = SYSTEM_FIELDS[system]
+    return 1 + -(-(len(fields) - 3) // 4)
+
+
+def complete_lines(lines, kind, header):
+    """
+    Count the leading lines that form complete epochs/records.
+
+    A block cut short by the writer is left for the next run.
+
+    Args:
+        lines (list): Lines following the checkpoint offset
+        kind (str): 'obs' or 'nav'
+        header (dict): Header of the file
+
+    Returns:
+        int: Number of lines that can be parsed now
+    """
+    lines_per_sat = -(-len(header.get('obs_types', ())) // 5)
+    i = 0
+    while i < len(lines):
+        if kind == 'obs':
+            length = _obs_block_length(lines, i, header, lines_per_sat)
+        else:
+            length = _nav_block_length(lines, i, header)
+        if i + length > len(lines):
+            break
+        i += length
+    return i
+
+
+def load_checkpoint(store_dir):
+    """
+    Load the checkpoint of a store directory (None when the store is new).
+    """
+    path = os.path.join(store_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_checkpoint(store_dir, checkpoint):
+    # Write then rename, so an interrupted run never leaves a torn checkpoint
+    path = os.path.join(store_dir, CHECKPOINT_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def _reset(store_dir):
+    for path in glob.glob(os.path.join(store_dir, 'part-*')):
+        os.remove(path)
+
+
+def follow(file, store_dir):
+    """
+    Parse the part of a RINEX file appended since the last call and store it.
+
+    The first call parses the whole body.  Later calls seek to the saved byte
+    offset and decode only complete epochs (observation files) or records
+    (navigation files) written since; an incomplete trailing block is left
+    for the next call.  If the header changed or the file shrank, the file
+    was replaced and the store is rebuilt from scratch.
+
+    Args:
+        file (str): Path to the RINEX observation or navigation file
+        store_dir (str): Store directory (created if missing)
+
+    Returns:
+        dict: Statistics ('kind', 'new_bytes', 'records', 'offset', 'part')
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    raw_header = _read_header_bytes(file)
+    digest = hashlib.sha1(raw_header).hexdigest()
+
+    checkpoint = load_checkpoint(store_dir)
+    if (checkpoint is None or checkpoint['digest'] != digest
+            or os.path.getsize(file) < checkpoint['offset']):
+        _reset(store_dir)
+        lines = raw_header.decode(_ENCODING).splitlines(keepends=True)
+        kind = 'obs' if lines[0][20] == 'O' else 'nav'
+        reader = rinex_obs if kind == 'obs' else rinex_nav
+        checkpoint = {
+            'source': os.path.abspath(file),
+            'kind': kind,
+            'digest': digest,
+            'header': reader.read_header(iter(lines)),
+            'offset': len(raw_header),
+            'parts': 0,
+        }
+    kind, header = checkpoint['kind'], checkpoint['header']
+
+    # Read what was appended, up to the last complete line
+    with open(file, 'rb') as f:
+        f.seek(checkpoint['offset'])
+        data = f.read()
+    data = data[:data.rfind(b'\n') + 1]
+    lines = data.decode(_ENCODING).splitlines(keepends=True)
+    num_lines = complete_lines(lines, kind, header)
+    text = ''.join(lines[:num_lines])
+
+    stats = {'kind': kind, 'new_bytes': len(text), 'records': 0, 'part': None}
+    if num_lines:
+        part = os.path.join(store_dir, _PART.format(checkpoint['parts']))
+        if kind == 'obs':
+            epochs = rinex_obs.iter_epochs(io.StringIO(text), header)
+            stats['records'], _ = save_epochs(epochs, header['obs_types'], part + '.npz')
+        else:
+            tables = rinex_nav.read_records_fixed(text.splitlines(), header)
+            for system, table in tables.items():
+                save_table(table, f'{part}-{system}.npz')
+                stats['records'] += len(table)
+        checkpoint['parts'] += 1
+        checkpoint['offset'] += len(text)
+        stats['part'] = part
+        _save_checkpoint(store_dir, checkpoint)
+    elif not os.path.exists(os.path.join(store_dir, CHECKPOINT_FILE)):
+        _save_checkpoint(store_dir, checkpoint)
+
+    stats['offset'] = checkpoint['offset']
+    return stats
+
+
+def load_store(store_dir):
+    """
+    Concatenate every part of a store directory.
+
+    Args:
+        store_dir (str): Store directory written by follow
+
+    Returns:
+        dict: For observation stores 'time', 'prn', 'obs' and 'obs_types'
+            arrays; for navigation stores system letter -> wide ephemeris table
+    """
+    checkpoint = load_checkpoint(store_dir)
+    parts = sorted(glob.glob(os.path.join(store_dir, 'part-*.npz')))
+    if checkpoint['kind'] == 'obs':
+        data = {'time': [], 'prn': [], 'obs': []}
+        for part in parts:
+            with np.load(part) as arrays:
+                for k in data:
+                    data[k].append(arrays[k])
+        obs_types = checkpoint['header']['obs_types']
+        if not parts:
+            return {'time': np.array([], dtype='datetime64[ns]'), 'prn': np.array([], dtype='U3'),
+                    'obs': np.empty((0, len(obs_types))), 'obs_types': np.array(obs_types)}
+        data = {k: np.concatenate(v) for k, v in data.items()}
+        data['obs_types'] = np.array(obs_types)
+        return data
+
+    tables = {}
+    for part in parts:
+        system = part[-len('X.npz'):-len('.npz')]
+        tables.setdefault(system, []).append(load_table(part))
+    return {system: to_table(pd.concat(chunks, ignore_index=True), [k for k in SYSTEM_FIELDS[system] if k])
+            for system, chunks in tables.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally parse a growing RINEX file")
+    parser.add_argument('file', help="RINEX observation or navigation file")
+    parser.add_argument('-o', '--store', required=True, help="Store directory")
+    parser.add_argument('--interval', type=float, default=0,
+                        help="Poll every INTERVAL seconds (default: run once)")
+    args = parser.parse_args(argv)
+
+    while True:
+        start = time.perf_counter()
+        stats = follow(args.file, args.store)
+        print(f"{args.file}: {stats['records']} new {'epochs' if stats['kind'] == 'obs' else 'records'}, "
+              f"{stats['new_bytes']} bytes in {time.perf_counter() - start:.3f} s (offset {stats['offset']})")
+        if args.interval <= 0:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
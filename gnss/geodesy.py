@@ -0,0 +1,143 @@
+import numpy as np
+
+from gnss.constants import WGS84_A, WGS84_E2
+
+# Fixed-point iterations of the geodetic latitude; 4 reach sub-millimetre
+# heights for anything between the Earth's surface and GNSS orbits.
+LATITUDE_ITERATIONS = 4
+
+
+def geodetic_to_ecef(lat, lon, h, degrees=True):
+    """
+    Convert WGS-84 geodetic coordinates to ECEF.
+
+    Args:
+        lat (array_like): Latitude
+        lon (array_like): Longitude, broadcast against lat
+        h (array_like): Ellipsoidal height [m], broadcast against lat
+        degrees (bool): Whether lat/lon are in degrees (radians otherwise)
+
+    Returns:
+        tuple: (X, Y, Z) in ECEF [m]
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    if degrees:
+        lat, lon = np.radians(lat), np.radians(lon)
+    N = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(lat)**2)
+    X = (N + h) * np.cos(lat) * np.cos(lon)
+    Y = (N + h) * np.cos(lat) * np.sin(lon)
+    Z = ((1 - WGS84_E2) * N + h) * np.sin(lat)
+    return X, Y, Z
+
+
+def ecef_to_geodetic(x, y, z, degrees=True):
+    """
+    Convert ECEF coordinates to WGS-84 geodetic latitude, longitude and height.
+
+    Args:
+        x, y, z (array_like): ECEF coordinates [m], broadcast against each other
+        degrees (bool): Whether to return lat/lon in degrees (radians otherwise)
+
+    Returns:
+        tuple: (lat, lon, h) with h in metres
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+    p = np.hypot(x, y)
+    lon = np.arctan2(y, x)
+    lat = np.arctan2(z, p * (1 - WGS84_E2))
+    for _ in range(LATITUDE_ITERATIONS):
+        N = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(lat)**2)
+        lat = np.arctan2(z + WGS84_E2 * N * np.sin(lat), p)
+    N = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(lat)**2)
+    h = p * np.cos(lat) + z * np.sin(lat) - WGS84_A**2 / N  # Stable at every latitude
+    if degrees:
+        lat, lon = np.degrees(lat), np.degrees(lon)
+    return lat, lon, h
+
+
+def enu_rotation(lat, lon, degrees=True):
+    """
+    Rotation matrices from ECEF to local east/north/up.
+
+    Args:
+        lat (array_like): Geodetic latitude of each station
+        lon (array_like): Longitude of each station, broadcast against lat
+        degrees (bool): Whether lat/lon are in degrees (radians otherwise)
+
+    Returns:
+        np.ndarray: Matrices of shape lat.shape + (3, 3); rows are the E, N, U unit vectors
+    """
+    lat, lon = np.broadcast_arrays(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64))
+    if degrees:
+        lat, lon = np.radians(lat), np.radians(lon)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    sin_lon, cos_lon = np.sin(lon), np.cos(lon)
+    zero = np.zeros_like(lat)
+    return np.stack([
+        np.stack([-sin_lon, cos_lon, zero], axis=-1),
+        np.stack([-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat], axis=-1),
+        np.stack([cos_lat * cos_lon, cos_lat * sin_lon, sin_lat], axis=-1),
+    ], axis=-2)
+
+
+def ecef_to_enu(positions, stations):
+    """
+    Express ECEF positions in the local east/north/up frame of one or more stations.
+
+    Every station costs one matrix multiply over all positions.
+
+    Args:
+        positions (array_like): ECEF positions [m], shape [N, 3]
+        stations (array_like): Station ECEF coordinates [m], shape [3] or [M, 3]
+
+    Returns:
+        np.ndarray: ENU coordinates [m], shape [N, 3] for one station, [M, N, 3] for several
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    stations = np.asarray(stations, dtype=np.float64)
+    single = stations.ndim == 1
+    stations = np.atleast_2d(stations)
+
+    lat, lon, _ = ecef_to_geodetic(stations[:, 0], stations[:, 1], stations[:, 2])
+    R = enu_rotation(lat, lon)
+    enu = np.stack([(positions - station) @ r.T for station, r in zip(stations, R)])
+    return enu[0] if single else enu
+
+
+def enu_to_az_el(enu, degrees=True):
+    """
+    Convert local east/north/up vectors to azimuth, elevation and range.
+
+    Args:
+        enu (array_like): ENU coordinates [m], shape [..., 3]
+        degrees (bool): Whether to return angles in degrees (radians otherwise)
+
+    Returns:
+        tuple: (azimuth clockwise from north, 0 to 360, elevation, range [m])
+    """
+    enu = np.asarray(enu, dtype=np.float64)
+    e, n, u = enu[..., 0], enu[..., 1], enu[..., 2]
+    rng = np.sqrt(e**2 + n**2 + u**2)
+    az = np.mod(np.arctan2(e, n), 2 * np.pi)
+    el = np.arcsin(u / rng)
+    if degrees:
+        az, el = np.degrees(az), np.degrees(el)
+    return az, el, rng
+
+
+def ecef_to_az_el(positions, stations, degrees=True):
+    """
+    Azimuth, elevation and range of ECEF positions seen from one or more stations.
+
+    Args:
+        positions (array_like): ECEF positions [m], shape [N, 3]
+        stations (array_like): Station ECEF coordinates [m], shape [3] or [M, 3]
+        degrees (bool): Whether to return angles in degrees (radians otherwise)
+
+    Returns:
+        tuple: (azimuth, elevation, range), each [N] for one station or [M, N] for several
+    """
+    return enu_to_az_el(ecef_to_enu(positions, stations), degrees)
@@ -0,0 +1,113 @@
+"""
+Carrier-smoothed pseudoranges (Hatch filter) over whole-file arrays.
+
+The Hatch filter with window N,
+
+    P_s[k] = P[k] / n + (1 - 1/n) * (P_s[k-1] + lambda * (L[k] - L[k-1])),   n = min(k + 1, N)
+
+restarts at every arc of gnss.cycle_slip (first sample, gap or slip).
+Written on code-minus-carrier s = P - lambda * L it is the linear
+recurrence s_s[k] = s[k] / n + (1 - 1/n) * s_s[k-1], which is evaluated for
+all epochs and satellites at once by recursive doubling: log2(E) array
+steps instead of a loop over epochs.
+
+On single-frequency data the smoothed code drifts with twice the
+ionospheric change over the window, so N should stay at a few minutes.
+"""
+import numpy as np
+
+from gnss import cycle_slip
+from gnss.constants import L1_WAVELENGTH
+from gnss.instrument import stage
+
+# Smoothing window [samples]: 100 s at 1 Hz
+WINDOW = 100
+
+# Recursive doubling stops once every remaining carry factor is below this
+_NEGLIGIBLE = 1e-17
+
+
+def _linear_scan(a, x):
+    """
+    Solve y[k] = a[k] * y[k-1] + x[k] along axis 0 (with y[-1] = 0).
+
+    Each step folds in the terms 2**i epochs back, so at most log2(E) steps
+    are needed, and fewer once the products of a have decayed.
+    """
+    y = x.copy()
+    carry = a.copy()
+    carry[0] = 0.0
+    step = 1
+    while step < len(y):
+        y[step:] += carry[step:] * y[:-step]
+        carry[step:] *= carry[:-step]
+        carry[:step] = 0.0
+        if not np.any(carry > _NEGLIGIBLE):
+            break
+        step *= 2
+    return y
+
+
+def smooth(code, phase, arc, window=WINDOW, wavelength=L1_WAVELENGTH):
+    """
+    Hatch-filter pseudoranges along carrier-phase arcs.
+
+    Args:
+        code (array_like): Pseudorange [m], shape [E, S], NaN where missing
+        phase (array_like): Carrier phase [cycles], shape [E, S]
+        arc (array_like): Arc number of every sample, -1 where there is no
+            phase (SlipDetection.arc from gnss.cycle_slip)
+        window (int): Smoothing window N [samples]
+        wavelength (float): Carrier wavelength [m]
+
+    Returns:
+        np.ndarray: Smoothed pseudorange [m], shape [E, S]; samples without
+            phase keep the raw code
+    """
+    code = np.asarray(code, dtype=np.float64)
+    carrier = wavelength * np.asarray(phase, dtype=np.float64)
+    arc = np.asarray(arc)
+
+    with stage('smooth'):
+        valid = arc >= 0
+
+        # Sample number n within the arc (1 at the arc start)
+        seen = np.cumsum(valid, axis=0)
+        first = np.full(arc.max() + 1 if valid.any() else 0, len(arc), dtype=seen.dtype)
+        np.minimum.at(first, arc[valid], seen[valid])
+        n = np.where(valid, seen - first[np.maximum(arc, 0)] + 1, 1)
+        n = np.minimum(n, window)
+
+        # Missing epochs inside an arc carry the filter state unchanged
+        cmc = np.where(valid, code - carrier, 0.0)
+        a = np.where(valid, 1.0 - 1.0 / n, 1.0)
+        smoothed = _linear_scan(a, cmc / n)
+
+    return np.where(valid, smoothed + carrier, code)
+
+
+def smooth_cube(cube, code_type='C1C', phase_type='L1C', window=WINDOW, slips=None):
+    """
+    Hatch-filter one pseudorange of an observation cube (see gnss.obs_cube).
+
+    Args:
+        cube (ObsCube): Observation cube
+        code_type (str): Pseudorange observation ('C1C', or 'C1' for RINEX 2)
+        phase_type (str): Carrier phase of the same signal ('L1C' or 'L1')
+        window (int): Smoothing window [samples]
+        slips (SlipDetection, optional): Arcs from gnss.cycle_slip.detect_cube
+            (default: detected here)
+
+    Returns:
+        np.ndarray: Smoothed pseudorange [m], shape [E, S]
+    """
+    if slips is None:
+        slips = cycle_slip.detect_cube(cube, code_type, phase_type)
+    return smooth(cube.obs_slice(code_type), cube.obs_slice(phase_type), slips.arc, window)
+
+
+def phase_type(code_type):
+    """
+    Carrier phase observation of the same signal as a pseudorange ('C1C' -> 'L1C', 'C1' -> 'L1').
+    """
+    return 'L' + code_type[1:]
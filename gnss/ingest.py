@@ -0,0 +1,248 @@
+"""
+Parse many RINEX files concurrently and write one binary artifact per input.
+
+Usage:
+    python -m gnss.ingest "../data/*.09o" ../data/brdc1810.09n -o ingested -j 4 [--report report.json]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from gnss import rinex_nav, rinex_obs
+from gnss.instrument import Instrument, count, stage
+from gnss.nav_store import save_table
+
+# RINEX file names: *.rnx or short names ending in yy + type letter (o, n, g, q, ...)
+RINEX_NAME = re.compile(r'\.(rnx|\d\d[a-z])$', re.IGNORECASE)
+
+# RINEX file type letters (column 21 of RINEX VERSION / TYPE) ingested as
+# observation and navigation files; other types (meteo 'M', clock 'C') are skipped
+OBS_TYPES = 'O'
+NAV_TYPES = 'NG'
+
+# Type labels used when column 21 is blank or holds another letter (shifted headers)
+OBS_LABELS = ('OBSERVATION DATA',)
+NAV_LABELS = ('NAVIGATION DATA', 'GLONASS')
+
+
+def detect(file):
+    """
+    Detect the kind of a RINEX file from its RINEX VERSION / TYPE line.
+
+    The file type letter in column 21 decides; when it is blank or not an
+    observation/navigation letter, the type label text is used instead.
+
+    Args:
+        file (str): Path to the RINEX file
+
+    Returns:
+        tuple: ('obs', 'nav' or None for any other file type, version)
+    """
+    with open(file, 'r') as f:
+        line = f.readline()
+    if "RINEX VERSION / TYPE" not in line:
+        raise ValueError(f"{file}: missing RINEX VERSION / TYPE line")
+    version = float(line.split()[0])
+    filetype, label = line[20], line[:60].upper()
+    if filetype in OBS_TYPES or any(text in label for text in OBS_LABELS):
+        return 'obs', version
+    if filetype in NAV_TYPES or any(text in label for text in NAV_LABELS):
+        return 'nav', version
+    return None, version
+
+
+def save_epochs(epochs, obs_types, output_file):
+    """
+    Flatten observation epochs to one row per (epoch, satellite) and save as .npz.
+
+    Args:
+        epochs (iterable): ObsEpoch tuples
+        obs_types (list): Observation types, in matrix column order
+        output_file (str): Output .npz path
+
+    Returns:
+        tuple: (number of epochs, number of rows)
+    """
+    times, prns, obs = [], [], []
+    with stage('body parse'):
+        for epoch in epochs:
+            times.append(np.full(len(epoch.prns), epoch.time))
+            prns.append(epoch.prns)
+            obs.append(epoch.obs)
+    if times:
+        data = {'time': np.concatenate(times), 'prn': np.concatenate(prns), 'obs': np.concatenate(obs)}
+    else:
+        data = {'time': np.array([], dtype='datetime64[ns]'), 'prn': np.array([], dtype='U3'),
+                'obs': np.empty((0, len(obs_types)))}
+    with stage('write'):
+        np.savez(output_file, obs_types=np.array(obs_types), **data)
+    return len(times), len(data['prn'])
+
+
+def output_names(files):
+    """
+    Artifact name of every input file: its path relative to the common
+    directory of all inputs, plus '.npz', so same-named files from different
+    directories do not overwrite each other.
+
+    Args:
+        files (list): Input file paths
+
+    Returns:
+        dict: Input path -> relative output path
+    """
+    if not files:
+        return {}
+    paths = {file: os.path.abspath(file) for file in files}
+    root = os.path.commonpath([os.path.dirname(path) for path in paths.values()])
+    return {file: os.path.relpath(path, root) + '.npz' for file, path in paths.items()}
+
+
+def ingest_file(file, output_dir, profile=False, trace_memory=False, name=None):
+    """
+    Parse one RINEX file and write its artifact to output_dir.
+
+    Navigation files become one wide ephemeris table per system, named
+    <name>-<system>.npz (see gnss.nav_store); observation files become flat
+    (time, prn, obs) arrays.
+
+    Args:
+        file (str): Path to the RINEX file
+        output_dir (str): Directory for the output artifact
+        profile (bool): Include a cProfile function profile in the report
+        trace_memory (bool): Include tracemalloc allocation statistics in the report
+        name (str, optional): Artifact path relative to output_dir (default:
+            the file name plus '.npz', see output_names())
+
+    Returns:
+        dict: Per-file statistics (kind, bytes, records, seconds, list of
+            output files) and
+            the instrumentation report, or a 'skipped' reason for file types
+            other than observation and navigation
+    """
+    start = time.perf_counter()
+    kind, version = detect(file)
+    if kind is None:
+        return {'file': file, 'skipped': 'not an observation or navigation file'}
+    name = name or os.path.basename(file) + '.npz'
+    output_file = os.path.join(output_dir, name)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    with Instrument(name, profile, trace_memory) as instrument:
+        if kind == 'nav':
+            tables = rinex_nav.read_nav_tables(file)
+            outputs = [f'{os.path.splitext(output_file)[0]}-{system}.npz' for system in sorted(tables)]
+            with stage('write'):
+                for system, path in zip(sorted(tables), outputs):
+                    save_table(tables[system], path)
+            records = sum(len(table) for table in tables.values())
+        else:
+            with open(file, 'r') as f:
+                header = rinex_obs.read_header(f)
+                _, records = save_epochs(rinex_obs.iter_epochs(f, header), header['obs_types'], output_file)
+            outputs = [output_file]
+
+    return {
+        'file': file,
+        'kind': kind,
+        'version': version,
+        'bytes': os.path.getsize(file),
+        'records': records,
+        'seconds': time.perf_counter() - start,
+        'output': outputs,
+        'report': instrument.report(),
+    }
+
+
+def _ingest_safe(file, output_dir, profile=False, trace_memory=False, name=None):
+    """
+    Run ingest_file, turning any exception into an error entry so one corrupt file does not abort the batch.
+    """
+    try:
+        return ingest_file(file, output_dir, profile, trace_memory, name)
+    except Exception as exc:
+        return {'file': file, 'error': f'{type(exc).__name__}: {exc}'}
+
+
+def expand_inputs(patterns):
+    """
+    Expand glob patterns and directories into a sorted list of RINEX files.
+
+    Args:
+        patterns (list): File paths, glob patterns or directories
+
+    Returns:
+        list: Unique file paths
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.update(os.path.join(pattern, name) for name in os.listdir(pattern)
+                         if RINEX_NAME.search(name))
+        else:
+            files.update(p for p in glob.glob(pattern) if os.path.isfile(p))
+    return sorted(files)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse RINEX files concurrently into binary artifacts")
+    parser.add_argument('inputs', nargs='+', help="RINEX files, glob patterns or directories")
+    parser.add_argument('-o', '--output-dir', default='ingested', help="Directory for output artifacts")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument('--report', help="Write a JSON instrumentation report to this file")
+    parser.add_argument('--profile', action='store_true', help="Include a cProfile profile per file in the report")
+    parser.add_argument('--trace-memory', action='store_true', help="Include tracemalloc statistics per file")
+    args = parser.parse_args(argv)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No input files found")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    names = output_names(files)
+    failed = skipped = 0
+    results = []
+    instrument = Instrument('ingest')
+    with instrument, ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(_ingest_safe, file, args.output_dir, args.profile, args.trace_memory, names[file])
+                   for file in files]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if 'error' in result:
+                failed += 1
+                count('parse errors')
+                print(f"FAILED {result['file']}: {result['error']}")
+                continue
+            if 'skipped' in result:
+                skipped += 1
+                count('files skipped')
+                print(f"SKIPPED {result['file']}: {result['skipped']}")
+                continue
+            instrument.merge(result['report'])
+            count('files')
+            mb_per_s = result['bytes'] / 1e6 / max(result['seconds'], 1e-9)
+            print(f"{result['file']}: {result['kind']} {result['records']} records, "
+                  f"{result['seconds']:.3f} s, {mb_per_s:.1f} MB/s -> {', '.join(result['output']) or 'nothing'}")
+
+    print(f"Processed {len(files)} files ({failed} failed, {skipped} skipped) in {instrument.wall_seconds:.2f} s")
+    print(instrument.summary())
+    if args.report:
+        report = instrument.report()
+        report['files'] = results
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report saved to {args.report}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Stage timers, counters and opt-in profiling for the processing pipeline.
+
+Library code reports through the module-level ``stage`` and ``count``
+helpers, which do nothing unless an Instrument is active:
+
+    with Instrument('ingest', profile=True) as inst:
+        ...
+    inst.save('report.json')
+
+Profiling can also be switched on without code changes through the
+GNSS_PROFILE and GNSS_TRACEMALLOC environment variables.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Functions and allocation sites listed in the report
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 10
+
+# Stack of active instruments (innermost last)
+_active = []
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a pipeline stage on the active instrument (no-op when none is active).
+    """
+    if not _active:
+        yield
+        return
+    with _active[-1].stage(name):
+        yield
+
+
+def count(name, n=1):
+    """
+    Add n to a counter of the active instrument (no-op when none is active).
+    """
+    if _active:
+        _active[-1].counters[name] += n
+
+
+def active():
+    """
+    Return the innermost active instrument, or None.
+    """
+    return _active[-1] if _active else None
+
+
+class Instrument:
+    """
+    Collect stage timings, counters and optional cProfile/tracemalloc data for one run.
+    """
+
+    def __init__(self, name='pipeline', profile=None, trace_memory=None):
+        """
+        Args:
+            name (str): Name of the run, copied to the report
+            profile (bool, optional): Collect a cProfile function profile
+                (default: GNSS_PROFILE environment variable)
+            trace_memory (bool, optional): Track allocations with tracemalloc
+                (default: GNSS_TRACEMALLOC environment variable)
+        """
+        self.name = name
+        self.profile = bool(os.environ.get('GNSS_PROFILE')) if profile is None else profile
+        self.trace_memory = bool(os.environ.get('GNSS_TRACEMALLOC')) if trace_memory is None else trace_memory
+        self.stages = defaultdict(lambda: {'seconds': 0.0, 'calls': 0})
+        self.counters = defaultdict(int)
+        self.wall_seconds = 0.0
+        self._profiler = None
+        self._start = None
+        self._memory = None
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a block under the given stage name; repeated stages accumulate.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages[name]
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def __enter__(self):
+        _active.append(self)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_seconds += time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            self._memory = self._memory_report()
+            tracemalloc.stop()
+        _active.remove(self)
+        return False
+
+    def _memory_report(self):
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATIONS]
+        return {
+            'current_mb': current / 2**20,
+            'peak_mb': peak / 2**20,
+            'top': [{'location': str(stat.traceback[0]), 'size_mb': stat.size / 2**20, 'count': stat.count}
+                    for stat in top],
+        }
+
+    def _profile_report(self):
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        stats.sort_stats('cumulative')
+        rows = []
+        for func in stats.fcn_list[:TOP_FUNCTIONS]:
+            calls, primitive, tottime, cumtime, _ = stats.stats[func]
+            rows.append({'function': f'{func[0]}:{func[1]}({func[2]})', 'calls': calls,
+                         'tottime': tottime, 'cumtime': cumtime})
+        return rows
+
+    def merge(self, report):
+        """
+        Add the stages and counters of another report (e.g. from a worker process).
+        """
+        for name, entry in report.get('stages', {}).items():
+            self.stages[name]['seconds'] += entry['seconds']
+            self.stages[name]['calls'] += entry['calls']
+        for name, n in report.get('counters', {}).items():
+            self.counters[name] += n
+
+    def report(self):
+        """
+        Build the machine-readable report.
+
+        Returns:
+            dict: 'name', 'wall_seconds', 'stages' (seconds, calls and share of
+                wall time), 'counters', and 'profile'/'memory' when enabled
+        """
+        wall = self.wall_seconds
+        if self._start is not None and self in _active:
+            wall += time.perf_counter() - self._start
+        report = {
+            'name': self.name,
+            'wall_seconds': wall,
+            'stages': {name: dict(entry, share=entry['seconds'] / wall if wall else None)
+                       for name, entry in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+        if self._profiler is not None:
+            report['profile'] = self._profile_report()
+        if self._memory is not None:
+            report['memory'] = self._memory
+        return report
+
+    def save(self, path):
+        """
+        Write the report as JSON.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def summary(self):
+        """
+        One line per stage and counter, for printing at the end of a script.
+        """
+        report = self.report()
+        lines = [f"{self.name}: {report['wall_seconds']:.3f} s"]
+        for name, entry in sorted(report['stages'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"  {name:16s} {entry['seconds']:9.3f} s  {entry['calls']:6d} calls")
+        for name, n in sorted(report['counters'].items()):
+            lines.append(f"  {name:16s} {n:9d}")
+        return '\n'.join(lines)
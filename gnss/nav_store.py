@@ -0,0 +1,154 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from gnss.constants import SECONDS_PER_WEEK
+from gnss.orbit import gps_seconds
+
+# Broadcast ephemeris fields in RINEX record order (GPS/QZSS layout)
+NAV_FIELDS = ['SVclockBias', 'SVclockDrift', 'SVclockDriftRate', 'IODE', 'Crs', 'DeltaN',
+              'M0', 'Cuc', 'Eccentricity', 'Cus', 'sqrtA', 'Toe', 'Cic', 'Omega0', 'Cis', 'Io',
+              'Crc', 'omega', 'OmegaDot', 'IDOT', 'CodesL2', 'GPSWeek', 'L2Pflag', 'SVacc',
+              'health', 'TGD', 'IODC', 'TransTime', 'FitIntvl']
+
+# Record layout of each RINEX 3 system, in record order (None marks a spare
+# field).  Galileo and IRNSS weeks are aligned with the GPS week, so they use
+# the 'GPSWeek' name; BeiDou keeps its own BDT week.  Issue-of-data and health
+# words are named 'IODE'/'health' in every Keplerian layout so the same
+# ephemeris index works across systems.  GLONASS and SBAS broadcast ECEF
+# state vectors in km, km/s and km/s^2.
+SYSTEM_FIELDS = {
+    'G': NAV_FIELDS,
+    'J': NAV_FIELDS,
+    'E': ['SVclockBias', 'SVclockDrift', 'SVclockDriftRate', 'IODE', 'Crs', 'DeltaN',
+          'M0', 'Cuc', 'Eccentricity', 'Cus', 'sqrtA', 'Toe', 'Cic', 'Omega0', 'Cis', 'Io',
+          'Crc', 'omega', 'OmegaDot', 'IDOT', 'DataSrc', 'GPSWeek', None, 'SISA',
+          'health', 'BGDe5a', 'BGDe5b', 'TransTime'],
+    'C': ['SVclockBias', 'SVclockDrift', 'SVclockDriftRate', 'IODE', 'Crs', 'DeltaN',
+          'M0', 'Cuc', 'Eccentricity', 'Cus', 'sqrtA', 'Toe', 'Cic', 'Omega0', 'Cis', 'Io',
+          'Crc', 'omega', 'OmegaDot', 'IDOT', None, 'BDTWeek', None, 'SVacc',
+          'health', 'TGD1', 'TGD2', 'TransTime', 'IODC'],
+    'I': ['SVclockBias', 'SVclockDrift', 'SVclockDriftRate', 'IODE', 'Crs', 'DeltaN',
+          'M0', 'Cuc', 'Eccentricity', 'Cus', 'sqrtA', 'Toe', 'Cic', 'Omega0', 'Cis', 'Io',
+          'Crc', 'omega', 'OmegaDot', 'IDOT', None, 'GPSWeek', None, 'SVacc',
+          'health', 'TGD', None, 'TransTime'],
+    'R': ['SVclockBias', 'SVrelFreqBias', 'MessageFrameTime', 'X', 'dX', 'dX2', 'health',
+          'Y', 'dY', 'dY2', 'FreqNum', 'Z', 'dZ', 'dZ2', 'AgeOpInfo'],
+    'S': ['SVclockBias', 'SVrelFreqBias', 'MessageFrameTime', 'X', 'dX', 'dX2', 'health',
+          'Y', 'dY', 'dY2', 'URA', 'Z', 'dZ', 'dZ2', 'IODN'],
+}
+
+
+def to_table(records, fields=NAV_FIELDS):
+    """
+    Build the wide ephemeris table from one dict (or row) per ephemeris.
+
+    The table has a 'Satellite' column, an 'Epoch Time' (Toc) datetime column
+    and one float64 column per field.  Rows are sorted by satellite and Toe,
+    and indexed by ('PRN', 'toe') where 'toe' is the Toe in seconds since the
+    GPS epoch.
+
+    Args:
+        records (list or pd.DataFrame): Ephemerides with 'Satellite', 'Epoch Time' and field values
+        fields (list): Ephemeris field names to keep as columns
+
+    Returns:
+        pd.DataFrame: Wide ephemeris table
+    """
+    df = pd.DataFrame(records)
+    if df.empty:
+        df = pd.DataFrame(columns=['Satellite', 'Epoch Time'])
+    columns = {
+        'Satellite': df['Satellite'].astype(str).to_numpy(),
+        'Epoch Time': pd.to_datetime(df['Epoch Time']).to_numpy(dtype='datetime64[ns]'),
+    }
+    for k in fields:
+        if k is None:
+            continue
+        if k in df:
+            columns[k] = pd.to_numeric(df[k], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            columns[k] = np.full(len(df), np.nan)
+    table = pd.DataFrame(columns)
+    return _index(table)
+
+
+def _index(table):
+    """
+    Sort the table by (satellite, Toe) and set the ('PRN', 'toe') index.
+
+    Layouts without a GPS-aligned week and Toe (BeiDou, GLONASS, SBAS) are
+    indexed by their epoch (Toc) instead.
+    """
+    if 'GPSWeek' in table and 'Toe' in table:
+        toe = table['GPSWeek'].to_numpy() * SECONDS_PER_WEEK + table['Toe'].to_numpy()
+    else:
+        toe = gps_seconds(table['Epoch Time'])
+    table.index = pd.MultiIndex.from_arrays([table['Satellite'].to_numpy(), toe], names=['PRN', 'toe'])
+    return table.sort_index(kind='stable')
+
+
+def from_long(df, fields=NAV_FIELDS):
+    """
+    Pivot a long-format Parameter/Value table into the wide ephemeris table.
+
+    Args:
+        df (pd.DataFrame): Rows of (satellite, 'Epoch Time', 'Parameter', 'Value');
+            the satellite column is named 'Satellite' or 'GPS'
+
+    Returns:
+        pd.DataFrame: Wide ephemeris table
+    """
+    satellite_col = 'Satellite' if 'Satellite' in df else 'GPS'
+    df = df.rename(columns={satellite_col: 'Satellite'})
+
+    # Convert 'Value' column to numeric, handling the case where 'F' is present
+    df['Value'] = pd.to_numeric(df['Value'].astype(str).str.replace('F', '', regex=False), errors='coerce')
+
+    wide = df.pivot_table(index=['Satellite', 'Epoch Time'], columns='Parameter',
+                          values='Value', aggfunc='first').reset_index()
+    return to_table(wide, fields)
+
+
+def save_table(table, path):
+    """
+    Save the ephemeris table in a binary columnar format.
+
+    '.parquet' files are written with pandas (requires pyarrow); anything
+    else is written as a NumPy .npz archive with one array per column.
+
+    Args:
+        table (pd.DataFrame): Wide ephemeris table
+        path (str): Output file path
+    """
+    if path.endswith('.parquet'):
+        table.reset_index(drop=True).to_parquet(path, index=False)
+        return
+    columns = {
+        'Satellite': table['Satellite'].to_numpy(dtype=str),
+        'Epoch Time': table['Epoch Time'].to_numpy(dtype='datetime64[ns]'),
+    }
+    for k in table.columns.drop(['Satellite', 'Epoch Time']):
+        columns[k] = table[k].to_numpy(dtype=np.float64)
+    np.savez(path, **columns)
+
+
+def load_table(path):
+    """
+    Load an ephemeris table written by save_table.
+
+    Args:
+        path (str): Path to a '.npz' or '.parquet' file
+
+    Returns:
+        pd.DataFrame: Wide ephemeris table
+    """
+    if path.endswith('.parquet'):
+        table = pd.read_parquet(path)
+    else:
+        if not os.path.exists(path) and os.path.exists(path + '.npz'):
+            path += '.npz'
+        with np.load(path) as data:
+            table = pd.DataFrame({k: data[k] for k in data.files})
+    return _index(table)
@@ -0,0 +1,171 @@
+import json
+import os
+from array import array
+
+import numpy as np
+
+from gnss import rinex_obs
+from gnss.instrument import stage
+
+# Files making up a cube directory
+DATA_FILE = 'obs.npy'
+TIMES_FILE = 'times.npy'
+META_FILE = 'meta.json'
+_ROWS_FILE = 'rows.tmp'
+
+# Rows scattered into the cube per step when the cube is assembled
+_CHUNK_ROWS = 1 << 16
+
+
+class ObsCube:
+    """
+    Dense [epoch x satellite x obs-type] observation array with NaN for missing values.
+
+    ``data`` is a read-only memory map; ``series`` and ``sat_slice`` return
+    views into it without copying or decoding anything.
+    """
+
+    def __init__(self, data, times, prns, obs_types, meta=None):
+        self.data = data
+        self.times = times
+        self.prns = list(prns)
+        self.obs_types = list(obs_types)
+        self.meta = meta or {}
+        self._sat = {prn: i for i, prn in enumerate(self.prns)}
+        self._obs = {t: i for i, t in enumerate(self.obs_types)}
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def sat_index(self, prn):
+        return self._sat[prn]
+
+    def obs_index(self, obs_type):
+        return self._obs[obs_type]
+
+    def series(self, prn, obs_type):
+        """
+        Whole-file time series of one observation type for one satellite (a view).
+        """
+        return self.data[:, self._sat[prn], self._obs[obs_type]]
+
+    def obs_slice(self, obs_type):
+        """
+        [epoch x satellite] array of one observation type (a view).
+        """
+        return self.data[:, :, self._obs[obs_type]]
+
+    def sat_slice(self, prn):
+        """
+        [epoch x obs-type] array of one satellite (a view).
+        """
+        return self.data[:, self._sat[prn], :]
+
+
+def write_cube(epochs, obs_types, directory, meta=None):
+    """
+    Persist a stream of observation epochs as a memory-mapped cube.
+
+    Epoch rows are first streamed to a temporary file, so memory stays flat
+    while the number of epochs and the satellite list are still unknown;
+    the dense cube is then allocated on disk and filled chunk by chunk.
+
+    Args:
+        epochs (iterable): ObsEpoch tuples whose obs columns follow obs_types
+        obs_types (list): Observation types (cube's last axis)
+        directory (str): Output directory (created if missing)
+        meta (dict, optional): Extra metadata stored in the sidecar
+
+    Returns:
+        ObsCube: The cube, opened read-only
+    """
+    os.makedirs(directory, exist_ok=True)
+    rows_path = os.path.join(directory, _ROWS_FILE)
+
+    times = array('q')
+    epoch_index = array('i')
+    sat_slot = array('i')
+    slots = {}
+    num_obs = len(obs_types)
+
+    with stage('body parse'), open(rows_path, 'wb') as rows:
+        for i, epoch in enumerate(epochs):
+            times.append(int(epoch.time.astype('datetime64[ns]').astype(np.int64)))
+            epoch_index.extend([i] * len(epoch.prns))
+            sat_slot.extend(slots.setdefault(prn, len(slots)) for prn in epoch.prns.tolist())
+            rows.write(np.ascontiguousarray(epoch.obs, dtype=np.float64).tobytes())
+
+    # Satellite axis in PRN order
+    prns = sorted(slots)
+    position = np.empty(len(slots), dtype=np.int64)
+    for i, prn in enumerate(prns):
+        position[slots[prn]] = i
+
+    with stage('write'):
+        shape = (len(times), len(prns), num_obs)
+        data = np.lib.format.open_memmap(os.path.join(directory, DATA_FILE), mode='w+', dtype=np.float64, shape=shape)
+        data[:] = np.nan
+
+        epoch_index = np.frombuffer(epoch_index, dtype=np.int32)
+        sat_position = position[np.frombuffer(sat_slot, dtype=np.int32)] if len(sat_slot) else np.empty(0, dtype=np.int64)
+        if len(epoch_index):
+            values = np.memmap(rows_path, dtype=np.float64, mode='r', shape=(len(epoch_index), num_obs))
+            for start in range(0, len(epoch_index), _CHUNK_ROWS):
+                stop = start + _CHUNK_ROWS
+                data[epoch_index[start:stop], sat_position[start:stop]] = values[start:stop]
+            del values
+        data.flush()
+        del data
+        os.remove(rows_path)
+
+        np.save(os.path.join(directory, TIMES_FILE), np.frombuffer(times, dtype=np.int64).astype('datetime64[ns]'))
+        sidecar = dict(meta or {})
+        sidecar.update({'shape': list(shape), 'dtype': 'float64', 'prns': prns, 'obs_types': list(obs_types)})
+        with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(sidecar, f)
+
+    return load_cube(directory)
+
+
+def build_cube(rinex_file, directory, obs_types=None, select=None):
+    """
+    Parse a RINEX 2 or 3 observation file straight into a cube directory.
+
+    Args:
+        rinex_file (str): Path to the RINEX observation file
+        directory (str): Output directory
+        obs_types (list, optional): Observation types to keep (default: all in the header)
+        select (callable, optional): Predicate on the PRN, applied at read time
+
+    Returns:
+        ObsCube: The cube, opened read-only
+    """
+    with open(rinex_file, 'r') as f:
+        header = rinex_obs.read_header(f)
+        obs_types = obs_types or header['obs_types']
+        meta = {
+            'source': os.path.basename(rinex_file),
+            'version': header.get('version'),
+            'position': header.get('position'),
+            'interval': header.get('interval'),
+        }
+        return write_cube(rinex_obs.iter_epochs(f, header, obs_types, select), obs_types, directory, meta)
+
+
+def load_cube(directory, mode='r'):
+    """
+    Open a cube directory written by write_cube without reading the observations.
+
+    Args:
+        directory (str): Cube directory
+        mode (str): Memory-map mode ('r' read-only, 'r+' read-write, 'c' copy-on-write)
+
+    Returns:
+        ObsCube
+    """
+    with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    data = np.load(os.path.join(directory, DATA_FILE), mmap_mode=mode)
+    times = np.load(os.path.join(directory, TIMES_FILE))
+    return ObsCube(data, times, meta['prns'], meta['obs_types'], meta)
@@ -0,0 +1,323 @@
+from collections import namedtuple
+
+import numpy as np
+
+from gnss.constants import GM, OMEGA_E, F_REL, GPS_EPOCH, SECONDS_PER_WEEK, HALF_WEEK
+
+# Newton converges quadratically from E = M for GNSS eccentricities (< 0.1),
+# so a fixed number of iterations reaches machine precision without a
+# per-element convergence test.
+KEPLER_ITERATIONS = 6
+
+# Epoch-independent quantities derived once per ephemeris by prepare():
+# reference times, semi-major axis, corrected mean motion, sqrt(1 - e^2),
+# node longitude at Toe in ECEF and its rate, clock polynomial and the
+# relativistic coefficient F * e * sqrtA, next to the raw harmonic terms
+PREPARED_FIELDS = ['toe', 'A', 'n', 'e', 'sqrt_1me2', 'M0', 'omega', 'Cuc', 'Cus', 'Crc', 'Crs',
+                   'Io', 'IDOT', 'Cic', 'Cis', 'Omega_toe', 'Omega_rate', 'Toc', 'af0', 'af1', 'af2', 'rel']
+PREPARED_DTYPE = np.dtype([(k, 'f8') for k in PREPARED_FIELDS])
+
+SatelliteState = namedtuple('SatelliteState', ['X', 'Y', 'Z', 'VX', 'VY', 'VZ', 'clock', 'drift'])
+
+
+def gps_seconds(times):
+    """
+    Convert epoch times to seconds since the GPS epoch.
+
+    Args:
+        times (array_like): datetime, numpy.datetime64 or pandas timestamps
+
+    Returns:
+        np.ndarray: Seconds since 1980-01-06 00:00:00 as float64
+    """
+    times = np.asarray(times, dtype='datetime64[ns]')
+    return (times - GPS_EPOCH).astype(np.int64) / 1e9
+
+
+def _field(eph, name):
+    """
+    Fetch one ephemeris field as a float64 array.
+
+    Works for dicts of scalars/arrays, DataFrames and structured arrays.
+    """
+    return np.asarray(eph[name], dtype=np.float64)
+
+
+def solve_kepler(M, e, iterations=KEPLER_ITERATIONS):
+    """
+    Solve Kepler's equation M = E - e*sin(E) for arrays of M and e.
+
+    Args:
+        M (array_like): Mean anomaly [rad]
+        e (array_like): Eccentricity, broadcast against M
+        iterations (int): Number of Newton steps applied to every element
+
+    Returns:
+        np.ndarray: Eccentric anomaly [rad]
+    """
+    M = np.asarray(M, dtype=np.float64)
+    Ek = M + np.zeros_like(e)  # Initial guess, broadcast to the common shape
+    for _ in range(iterations):
+        Ek = Ek - (Ek - e * np.sin(Ek) - M) / (1 - e * np.cos(Ek))  # Newton's method
+    return Ek
+
+
+def time_from_ephemeris(eph, t):
+    """
+    Compute tk, the time from the ephemeris reference epoch (Toe).
+
+    Args:
+        eph: Ephemeris fields ('GPSWeek', 'Toe')
+        t (array_like): GPS time in seconds since the GPS epoch
+
+    Returns:
+        np.ndarray: tk in seconds, corrected for the week crossover
+    """
+    toe = _field(eph, 'GPSWeek') * SECONDS_PER_WEEK + _field(eph, 'Toe')
+    return _wrap_week(np.asarray(t, dtype=np.float64) - toe)
+
+
+def _wrap_week(dt):
+    """
+    Bring a time difference into [-half week, half week] (week crossover).
+    """
+    dt = np.where(dt > HALF_WEEK, dt - SECONDS_PER_WEEK, dt)
+    return np.where(dt < -HALF_WEEK, dt + SECONDS_PER_WEEK, dt)
+
+
+def _has(eph, name):
+    """
+    Check whether an ephemeris container (dict, DataFrame, structured array) has a field.
+    """
+    names = getattr(getattr(eph, 'dtype', None), 'names', None)
+    return name in names if names else name in eph
+
+
+def is_prepared(eph):
+    return isinstance(eph, np.ndarray) and eph.dtype == PREPARED_DTYPE
+
+
+def prepare(eph):
+    """
+    Derive the epoch-independent propagation constants of broadcast ephemerides.
+
+    The result holds everything propagate, eccentric_anomaly and
+    satellite_clock need, so ephemerides evaluated at many epochs are
+    prepared once instead of on every call.  Already prepared input is
+    returned unchanged.
+
+    Args:
+        eph: Ephemeris fields keyed by RINEX field name (dict, DataFrame,
+            structured array or gnss.ephemeris types); 'Toc' in seconds since
+            the GPS epoch is copied when present
+
+    Returns:
+        np.ndarray: Structured array of PREPARED_DTYPE, shaped like the fields
+    """
+    if is_prepared(eph):
+        return eph
+    sqrtA = _field(eph, 'sqrtA')
+    e = _field(eph, 'Eccentricity')
+    toe = _field(eph, 'Toe')
+    fields = {
+        'toe': _field(eph, 'GPSWeek') * SECONDS_PER_WEEK + toe,
+        'A': sqrtA**2,
+        'n': np.sqrt(GM) / (sqrtA**3) + _field(eph, 'DeltaN'),
+        'e': e,
+        'sqrt_1me2': np.sqrt(1 - e**2),
+        'M0': _field(eph, 'M0'),
+        'omega': _field(eph, 'omega'),
+        'Cuc': _field(eph, 'Cuc'),
+        'Cus': _field(eph, 'Cus'),
+        'Crc': _field(eph, 'Crc'),
+        'Crs': _field(eph, 'Crs'),
+        'Io': _field(eph, 'Io'),
+        'IDOT': _field(eph, 'IDOT'),
+        'Cic': _field(eph, 'Cic'),
+        'Cis': _field(eph, 'Cis'),
+        'Omega_toe': _field(eph, 'Omega0') - OMEGA_E * toe,  # Node longitude at Toe in ECEF
+        'Omega_rate': _field(eph, 'OmegaDot') - OMEGA_E,
+        'Toc': _field(eph, 'Toc') if _has(eph, 'Toc') else np.nan,
+        'af0': _field(eph, 'SVclockBias') if _has(eph, 'SVclockBias') else 0.0,
+        'af1': _field(eph, 'SVclockDrift') if _has(eph, 'SVclockDrift') else 0.0,
+        'af2': _field(eph, 'SVclockDriftRate') if _has(eph, 'SVclockDriftRate') else 0.0,
+        'rel': F_REL * e * sqrtA,
+    }
+    shape = np.broadcast(*fields.values()).shape
+    prepared = np.empty(shape, dtype=PREPARED_DTYPE)
+    for k, v in fields.items():
+        prepared[k] = v
+    return prepared
+
+
+def eccentric_anomaly(eph, t):
+    """
+    Compute the eccentric anomaly Ek of broadcast ephemerides at GPS time t.
+
+    Args:
+        eph: Ephemeris fields (sqrtA, Eccentricity, M0, DeltaN, Toe, GPSWeek) or prepared ephemerides
+        t (array_like): GPS time in seconds since the GPS epoch
+
+    Returns:
+        np.ndarray: Ek [rad]
+    """
+    eph = prepare(eph)
+    tk = _wrap_week(np.asarray(t, dtype=np.float64) - eph['toe'])
+    return solve_kepler(eph['M0'] + eph['n'] * tk, eph['e'])
+
+
+def satellite_clock(eph, t, toc=None):
+    """
+    Compute the satellite clock offset from the broadcast clock polynomial.
+
+    The offset includes the relativistic eccentricity term but not the group
+    delay: single-frequency L1 users subtract TGD from the result.
+
+    Args:
+        eph: Ephemeris fields (SVclockBias, SVclockDrift, SVclockDriftRate and
+            the orbit fields used by eccentric_anomaly) or prepared ephemerides
+        t (array_like): GPS time in seconds since the GPS epoch
+        toc (array_like, optional): Clock reference time (Toc) in seconds since
+            the GPS epoch (default: the ephemeris 'Toc' field)
+
+    Returns:
+        np.ndarray: Satellite clock offset [s]
+    """
+    eph = prepare(eph)
+    if toc is None:
+        toc = eph['Toc']
+    dt = _wrap_week(np.asarray(t, dtype=np.float64) - toc)
+    Ek = eccentric_anomaly(eph, t)
+    return eph['af0'] + eph['af1'] * dt + eph['af2'] * dt**2 + eph['rel'] * np.sin(Ek)
+
+
+def _orbit_terms(eph, t):
+    """
+    Orbital-plane quantities shared by propagate and propagate_state.
+
+    Args:
+        eph (np.ndarray): Prepared ephemerides
+        t (array_like): GPS time in seconds since the GPS epoch
+
+    Returns:
+        dict: tk, Ek, vk, cos2phi, sin2phi, uk, rk, ik and Lambda_k
+    """
+    e = eph['e']
+    tk = _wrap_week(np.asarray(t, dtype=np.float64) - eph['toe'])
+
+    # Mean anomaly for tk and eccentric anomaly (Ek)
+    Ek = solve_kepler(eph['M0'] + eph['n'] * tk, e)
+
+    # Calculate true anomaly (vk) and argument of latitude (uk)
+    vk = np.arctan2(eph['sqrt_1me2'] * np.sin(Ek), np.cos(Ek) - e)
+    phi = eph['omega'] + vk
+    cos2phi = np.cos(2 * phi)
+    sin2phi = np.sin(2 * phi)
+
+    # Apply perturbation corrections
+    uk = phi + eph['Cuc'] * cos2phi + eph['Cus'] * sin2phi
+    rk = eph['A'] * (1 - e * np.cos(Ek)) + eph['Crc'] * cos2phi + eph['Crs'] * sin2phi
+    ik = eph['Io'] + eph['IDOT'] * tk + eph['Cic'] * cos2phi + eph['Cis'] * sin2phi
+
+    # Calculate longitude of ascending node (Lambda_k)
+    Lambda_k = eph['Omega_toe'] + eph['Omega_rate'] * tk
+    return {'tk': tk, 'Ek': Ek, 'vk': vk, 'cos2phi': cos2phi, 'sin2phi': sin2phi,
+            'uk': uk, 'rk': rk, 'ik': ik, 'Lambda_k': Lambda_k}
+
+
+def propagate(eph, t):
+    """
+    Convert broadcast Keplerian elements to ECEF coordinates in one vectorized pass.
+
+    Every ephemeris field and ``t`` are broadcast against each other, so the
+    same call handles one ephemeris at many epochs, many ephemerides at one
+    epoch, or matched arrays of both.  Pass prepare(eph) when the same
+    ephemerides are propagated repeatedly.
+
+    Args:
+        eph: Navigation parameters keyed by RINEX field name (dict, DataFrame
+            or structured array): sqrtA, Eccentricity, M0, DeltaN, omega,
+            Cus, Cuc, Crc, Crs, Io, IDOT, Cic, Cis, Omega0, OmegaDot, Toe,
+            GPSWeek; or the output of prepare
+        t (array_like): GPS time in seconds since the GPS epoch
+
+    Returns:
+        tuple: (X, Y, Z) satellite coordinates in ECEF [m]
+    """
+    o = _orbit_terms(prepare(eph), t)
+
+    # Calculate satellite position in orbital plane
+    xk_prime = o['rk'] * np.cos(o['uk'])
+    yk_prime = o['rk'] * np.sin(o['uk'])
+
+    # Calculate ECEF coordinates
+    cos_lambda = np.cos(o['Lambda_k'])
+    sin_lambda = np.sin(o['Lambda_k'])
+    cos_i = np.cos(o['ik'])
+    X = xk_prime * cos_lambda - yk_prime * cos_i * sin_lambda
+    Y = xk_prime * sin_lambda + yk_prime * cos_i * cos_lambda
+    Z = yk_prime * np.sin(o['ik'])
+    return X, Y, Z
+
+
+def propagate_state(eph, t):
+    """
+    Satellite position, velocity, clock offset and clock drift in one vectorized pass.
+
+    The velocity is the analytic time derivative of the broadcast orbit
+    (through Ek, uk, rk, ik and Lambda_k), computed from the same
+    intermediate terms as the position, and the drift is the derivative of
+    the clock offset including the relativistic term.  Broadcasting
+    follows propagate.
+
+    Args:
+        eph: Ephemeris fields (see propagate and satellite_clock) or prepared ephemerides
+        t (array_like): GPS time in seconds since the GPS epoch
+
+    Returns:
+        SatelliteState: ECEF position [m], ECEF velocity [m/s], clock offset [s]
+            (TGD not applied) and clock drift [s/s]
+    """
+    eph = prepare(eph)
+    o = _orbit_terms(eph, t)
+    e = eph['e']
+    uk, rk, ik, Lambda_k = o['uk'], o['rk'], o['ik'], o['Lambda_k']
+    sin_E = np.sin(o['Ek'])
+    one_minus_ecosE = 1 - e * np.cos(o['Ek'])
+
+    # Rates of the anomalies and of the corrected orbital elements
+    Ek_dot = eph['n'] / one_minus_ecosE
+    vk_dot = Ek_dot * eph['sqrt_1me2'] / one_minus_ecosE
+    uk_dot = vk_dot * (1 + 2 * (eph['Cus'] * o['cos2phi'] - eph['Cuc'] * o['sin2phi']))
+    rk_dot = (eph['A'] * e * sin_E * Ek_dot
+              + 2 * vk_dot * (eph['Crs'] * o['cos2phi'] - eph['Crc'] * o['sin2phi']))
+    ik_dot = eph['IDOT'] + 2 * vk_dot * (eph['Cis'] * o['cos2phi'] - eph['Cic'] * o['sin2phi'])
+    Lambda_dot = eph['Omega_rate']
+
+    # Position and velocity in the orbital plane
+    cos_u = np.cos(uk)
+    sin_u = np.sin(uk)
+    xk_prime = rk * cos_u
+    yk_prime = rk * sin_u
+    xk_prime_dot = rk_dot * cos_u - rk * uk_dot * sin_u
+    yk_prime_dot = rk_dot * sin_u + rk * uk_dot * cos_u
+
+    # Rotate to ECEF
+    cos_lambda = np.cos(Lambda_k)
+    sin_lambda = np.sin(Lambda_k)
+    cos_i = np.cos(ik)
+    sin_i = np.sin(ik)
+    X = xk_prime * cos_lambda - yk_prime * cos_i * sin_lambda
+    Y = xk_prime * sin_lambda + yk_prime * cos_i * cos_lambda
+    Z = yk_prime * sin_i
+    VX = (xk_prime_dot * cos_lambda - yk_prime_dot * cos_i * sin_lambda
+          + yk_prime * sin_i * sin_lambda * ik_dot - Y * Lambda_dot)
+    VY = (xk_prime_dot * sin_lambda + yk_prime_dot * cos_i * cos_lambda
+          - yk_prime * sin_i * cos_lambda * ik_dot + X * Lambda_dot)
+    VZ = yk_prime_dot * sin_i + yk_prime * cos_i * ik_dot
+
+    # Clock offset and drift from the same eccentric anomaly
+    dt = _wrap_week(np.asarray(t, dtype=np.float64) - eph['Toc'])
+    clock = eph['af0'] + eph['af1'] * dt + eph['af2'] * dt**2 + eph['rel'] * sin_E
+    drift = eph['af1'] + 2 * eph['af2'] * dt + eph['rel'] * np.cos(o['Ek']) * Ek_dot
+    return SatelliteState(X, Y, Z, VX, VY, VZ, clock, drift)
@@ -0,0 +1,189 @@
+"""
+Satellite position figures shared by the plot/ scripts and the ``plot`` command.
+
+matplotlib is imported inside each function, so importing this module (or
+the command line) does not load it.
+"""
+import os
+
+import numpy as np
+
+from gnss.geodesy import ecef_to_az_el, ecef_to_enu, geodetic_to_ecef
+
+# Default observation station: Hanoi (lat, lon in degrees, height in m)
+STATION = (21.0285, 105.8542, 10)
+
+# Resolution of saved figures
+DPI = 300
+
+
+def _label_qzss(ax, satellite_ids, *coords, **kwargs):
+    """
+    Label the QZSS points of a scatter plot with their satellite ID.
+    """
+    for i, sat_id in enumerate(satellite_ids):
+        if "QZSS" in sat_id:
+            ax.text(*(c[i] for c in coords), sat_id, fontsize=8, color='red', **kwargs)
+
+
+def ecef_axes():
+    """
+    Empty ECEF chart: 3D axes, labels and a colorbar for Z.
+
+    Returns:
+        tuple: (figure, axes, colorbar)
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.cm import ScalarMappable
+
+    fig = plt.figure(figsize=(10, 10))
+    ax = fig.add_subplot(111, projection='3d')
+    ax.set_xlabel("X (meters)")
+    ax.set_ylabel("Y (meters)")
+    ax.set_zlabel("Z (meters)")
+    ax.set_title("ECEF Coordinates - Satellite Positions")
+    cbar = fig.colorbar(ScalarMappable(cmap='viridis'), ax=ax)
+    cbar.set_label("Z (meters)")
+    return fig, ax, cbar
+
+
+def draw_ecef(ax, cbar, positions, satellite_ids, station=None):
+    """
+    Scatter ECEF positions into an ecef_axes() chart (station is unused).
+    """
+    x, y, z = np.asarray(positions, dtype=np.float64).T
+    sc = ax.scatter(x, y, z, c=z, cmap='viridis', s=50, alpha=0.7)
+    _label_qzss(ax, satellite_ids, x, y, z)
+    cbar.update_normal(sc)
+
+
+def ecef_figure(positions, satellite_ids):
+    """
+    3D scatter of satellite positions in ECEF.
+
+    Args:
+        positions (array_like): ECEF positions [m], shape [N, 3]
+        satellite_ids (list): Satellite ID of every position
+
+    Returns:
+        matplotlib.figure.Figure
+    """
+    fig, ax, cbar = ecef_axes()
+    draw_ecef(ax, cbar, positions, satellite_ids)
+    return fig
+
+
+def enu_axes():
+    """
+    Empty ENU chart: 3D axes and labels (no colorbar).
+
+    Returns:
+        tuple: (figure, axes, None)
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(8, 6))
+    ax = fig.add_subplot(111, projection='3d')
+    ax.set_xlabel("East (m)")
+    ax.set_ylabel("North (m)")
+    ax.set_zlabel("Up (m)")
+    ax.set_title("Satellite Orbits in ENU Coordinate System")
+    return fig, ax, None
+
+
+def draw_enu(ax, cbar, positions, satellite_ids, station=STATION):
+    """
+    Draw the ENU track of every satellite into an enu_axes() chart.
+    """
+    enu = ecef_to_enu(np.asarray(positions, dtype=np.float64), geodetic_to_ecef(*station))
+    satellite_ids = np.asarray(satellite_ids, dtype=str)
+    for satellite in np.unique(satellite_ids):
+        track = enu[satellite_ids == satellite]
+        ax.plot(track[:, 0], track[:, 1], track[:, 2], marker="o", linestyle="-", label=satellite)
+    ax.legend()
+
+
+def enu_figure(positions, satellite_ids, station=STATION):
+    """
+    3D orbit tracks of every satellite in the station's ENU frame.
+
+    Args:
+        positions (array_like): ECEF positions [m], shape [N, 3], in time order per satellite
+        satellite_ids (list): Satellite ID of every position
+        station (tuple): Station latitude, longitude [deg] and height [m]
+
+    Returns:
+        matplotlib.figure.Figure
+    """
+    fig, ax, cbar = enu_axes()
+    draw_enu(ax, cbar, positions, satellite_ids, station)
+    return fig
+
+
+def sky_axes(title="Sky-Satellite Plot - QZSS System"):
+    """
+    Empty sky chart: azimuth/elevation axes and an elevation colorbar.
+
+    Returns:
+        tuple: (figure, axes, colorbar)
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.cm import ScalarMappable
+
+    fig, ax = plt.subplots(figsize=(8, 8))
+    ax.set_aspect('equal')
+    ax.set_xlim(0, 360)
+    ax.set_ylim(-90, 90)
+    ax.set_xlabel("Azimuth (degrees)")
+    ax.set_ylabel("Elevation (degrees)")
+    ax.set_title(title)
+    cbar = fig.colorbar(ScalarMappable(cmap='viridis'), ax=ax)
+    cbar.set_label("Elevation (degrees)")
+    return fig, ax, cbar
+
+
+def draw_sky(ax, cbar, positions, satellite_ids, station=STATION):
+    """
+    Scatter the azimuth/elevation of satellite positions into a sky_axes() chart.
+    """
+    azimuths, elevations, _ = ecef_to_az_el(np.asarray(positions, dtype=np.float64), geodetic_to_ecef(*station))
+    scatter = ax.scatter(azimuths, elevations, c=elevations, cmap='viridis', s=20, alpha=0.7)
+    _label_qzss(ax, [str(s) for s in satellite_ids], azimuths, elevations, ha='center')
+    cbar.update_normal(scatter)
+
+
+def sky_figure(positions, satellite_ids, station=STATION, title="Sky-Satellite Plot - QZSS System"):
+    """
+    Azimuth/elevation scatter of satellite positions seen from a station.
+
+    Args:
+        positions (array_like): ECEF positions [m], shape [N, 3]
+        satellite_ids (list): Satellite ID of every position
+        station (tuple): Station latitude, longitude [deg] and height [m]
+        title (str): Figure title
+
+    Returns:
+        matplotlib.figure.Figure
+    """
+    fig, ax, cbar = sky_axes(title)
+    draw_sky(ax, cbar, positions, satellite_ids, station)
+    return fig
+
+
+FIGURES = {'ecef': ecef_figure, 'enu': enu_figure, 'sky': sky_figure}
+
+# Chart templates for reuse across many charts of one kind: (empty axes, draw)
+TEMPLATES = {'ecef': (ecef_axes, draw_ecef), 'enu': (enu_axes, draw_enu), 'sky': (sky_axes, draw_sky)}
+
+
+def save_figure(fig, output_image, dpi=DPI):
+    """
+    Save a figure (creating its directory) and close it.
+    """
+    import matplotlib.pyplot as plt
+
+    directory = os.path.dirname(output_image)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig.savefig(output_image, dpi=dpi)
+    plt.close(fig)
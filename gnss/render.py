@@ -0,0 +1,195 @@
+"""
+Batch chart rendering with figure reuse, a process pool and skip-unchanged.
+
+Charts are described as data and rendered off-screen (Agg):
+
+    charts = satellite_charts('enu', positions, satellite_ids, 'enu_plots', station)
+    rendered, skipped = render(charts, jobs=4)
+
+Every worker process builds one figure per chart kind (gnss.plots.TEMPLATES)
+and only swaps the data artists between charts.  A manifest in each output
+directory records a digest of every chart's inputs; charts whose digest and
+output file are unchanged are not rendered again.
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from gnss.instrument import count, stage
+from gnss.plots import DPI, STATION
+
+# Manifest of input digests, one per output directory
+MANIFEST_FILE = '.render_manifest.json'
+
+# Bumped whenever chart drawing changes, so every chart is rendered again
+RENDER_VERSION = 1
+
+# One chart: kind ('ecef', 'enu' or 'sky'), output image path, ECEF positions
+# [N, 3], satellite ID of every position, station (lat, lon, h) and title
+# (None keeps the template's)
+Chart = namedtuple('Chart', ['kind', 'path', 'positions', 'satellite_ids', 'station', 'title'])
+
+# Figures of the current process, one per chart kind: (figure, axes, colorbar, title)
+_figures = {}
+
+
+def chart(kind, path, positions, satellite_ids, station=STATION, title=None):
+    """
+    Describe one chart (positions are converted to a float64 array).
+    """
+    return Chart(kind, path, np.asarray(positions, dtype=np.float64), [str(s) for s in satellite_ids],
+                 tuple(station), title)
+
+
+def satellite_charts(kind, positions, satellite_ids, output_dir, station=STATION, all_name=None):
+    """
+    One chart per satellite, named <output_dir>/<satellite>.png.
+
+    Args:
+        kind (str): Chart kind ('ecef', 'enu' or 'sky')
+        positions (array_like): ECEF positions [m], shape [N, 3]
+        satellite_ids (array_like): Satellite ID of every position
+        output_dir (str): Output directory
+        station (tuple): Station latitude, longitude [deg] and height [m]
+        all_name (str, optional): Also chart every satellite together under this file name
+
+    Returns:
+        list: Chart tuples
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    satellite_ids = np.asarray(satellite_ids, dtype=str)
+    charts = [chart(kind, os.path.join(output_dir, f"{satellite}.png"), positions[satellite_ids == satellite],
+                    [satellite] * int(np.sum(satellite_ids == satellite)), station, satellite)
+              for satellite in np.unique(satellite_ids)]
+    if all_name:
+        charts.append(chart(kind, os.path.join(output_dir, all_name), positions, satellite_ids, station))
+    return charts
+
+
+def digest(item, dpi=DPI):
+    """
+    Digest of everything that determines a chart's image.
+    """
+    h = hashlib.blake2b(f'{RENDER_VERSION}:{item.kind}:{item.title}:{item.station}:{dpi}'.encode(),
+                        digest_size=20)
+    h.update(np.ascontiguousarray(item.positions).tobytes())
+    h.update('\0'.join(item.satellite_ids).encode())
+    return h.hexdigest()
+
+
+def _template(kind):
+    """
+    The reusable figure of a chart kind, emptied of the previous chart's data.
+    """
+    from gnss.plots import TEMPLATES
+
+    if kind not in _figures:
+        fig, ax, cbar = TEMPLATES[kind][0]()
+        _figures[kind] = (fig, ax, cbar, ax.get_title())
+    fig, ax, cbar, title = _figures[kind]
+    for artist in list(ax.lines) + list(ax.collections) + list(ax.texts):
+        artist.remove()
+    if ax.get_legend() is not None:
+        ax.get_legend().remove()
+    ax.set_prop_cycle(None)  # Line colours restart as on a new figure
+    ax.set_title(title)
+    return fig, ax, cbar
+
+
+def render_chart(item, dpi=DPI):
+    """
+    Render one chart into the reusable figure of its kind and save it (Agg backend).
+
+    Returns:
+        str: The output path
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from gnss.plots import TEMPLATES
+
+    fig, ax, cbar = _template(item.kind)
+    TEMPLATES[item.kind][1](ax, cbar, item.positions, item.satellite_ids, item.station)
+    if item.title is not None:
+        ax.set_title(item.title)
+    directory = os.path.dirname(item.path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig.savefig(item.path, dpi=dpi)
+    return item.path
+
+
+def _render_batch(items, dpi):
+    """
+    Worker entry point: render a batch of charts in one process.
+    """
+    return [render_chart(item, dpi) for item in items]
+
+
+def _load_manifest(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def render(charts, jobs=None, dpi=DPI, force=False):
+    """
+    Render charts whose inputs changed since the last run, in parallel.
+
+    Charts are split into one batch per worker, so every process builds
+    each figure template once.
+
+    Args:
+        charts (list): Chart tuples (see chart() and satellite_charts())
+        jobs (int, optional): Worker processes (default: CPU count; 1 renders in this process)
+        dpi (int): Image resolution
+        force (bool): Render every chart even if it is unchanged
+
+    Returns:
+        tuple: (rendered, skipped) lists of output paths
+    """
+    manifests = {}
+    pending, skipped = [], []
+    for item in charts:
+        directory = os.path.dirname(item.path) or '.'
+        manifest = manifests.setdefault(directory, _load_manifest(directory))
+        key = digest(item, dpi)
+        name = os.path.basename(item.path)
+        if not force and manifest.get(name) == key and os.path.exists(item.path):
+            skipped.append(item.path)
+        else:
+            pending.append((item, directory, name, key))
+    count('charts skipped', len(skipped))
+
+    jobs = min(jobs or os.cpu_count() or 1, len(pending))
+    rendered = []
+    with stage('render'):
+        if jobs <= 1:
+            rendered = _render_batch([p[0] for p in pending], dpi)
+        else:
+            # Round-robin batches balance charts of similar size across workers
+            batches = [[p[0] for p in pending[i::jobs]] for i in range(jobs)]
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                for future in as_completed([pool.submit(_render_batch, batch, dpi) for batch in batches]):
+                    rendered.extend(future.result())
+    count('charts rendered', len(rendered))
+
+    for item, directory, name, key in pending:
+        manifests[directory][name] = key
+    for directory, manifest in manifests.items():
+        if any(p[1] == directory for p in pending):
+            os.makedirs(directory, exist_ok=True)
+            _save_manifest(directory, manifest)
+    return rendered, skipped
@@ -0,0 +1,277 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from gnss.instrument import count, stage
+from gnss.nav_store import NAV_FIELDS, SYSTEM_FIELDS, to_table
+from gnss.rinex_obs import epoch_time
+
+# Number of continuation lines after the epoch line of a GPS/QZSS record
+_RECORD_LINES = 7
+
+# RINEX 2 navigation file type letter -> system
+_V2_SYSTEMS = {'N': 'G', 'G': 'R', 'H': 'S', 'J': 'J', 'Q': 'J'}
+
+# Fixed-width record layout: 19-character numeric fields, 4 per line, after a
+# 22 (RINEX 2) or 23 (RINEX 3) character PRN/epoch header and a 3 or 4
+# character indent on continuation lines.
+_FIELD_WIDTH = 19
+_FIELDS_PER_LINE = 4
+_LAYOUT = {
+    2: {'header': 22, 'indent': 3},
+    3: {'header': 23, 'indent': 4},
+}
+
+# PRN / epoch header fields, decoded in bulk through a structured bytes dtype
+_HEADER_DTYPE = {
+    2: np.dtype([('prn', 'S2'), ('_0', 'S1'), ('year', 'S2'), ('_1', 'S1'), ('month', 'S2'),
+                 ('_2', 'S1'), ('day', 'S2'), ('_3', 'S1'), ('hour', 'S2'), ('_4', 'S1'),
+                 ('minute', 'S2'), ('second', 'S5')]),
+    3: np.dtype([('prn', 'S3'), ('_0', 'S1'), ('year', 'S4'), ('_1', 'S1'), ('month', 'S2'),
+                 ('_2', 'S1'), ('day', 'S2'), ('_3', 'S1'), ('hour', 'S2'), ('_4', 'S1'),
+                 ('minute', 'S2'), ('_5', 'S1'), ('second', 'S2')]),
+}
+
+
+def extract_numbers(line):
+    """
+    Extract numerical values from a given line using regular expression.
+
+    Args:
+        line (str): Input line containing numerical values (D or E exponents)
+
+    Returns:
+        list: Extracted numerical values as strings
+    """
+    return re.findall(r'[-+]?\d*\.\d+E[+-]\d+|[-+]?\d+', line.replace('D', 'E'))
+
+
+def read_header(f):
+    """
+    Read a RINEX navigation header from an open file, stopping after END OF HEADER.
+
+    Args:
+        f: Open text file positioned at the start of the file
+
+    Returns:
+        dict: Header information ('version', 'filetype', 'system')
+    """
+    header = {}
+    for line in f:
+        if "END OF HEADER" in line:
+            break
+        elif "RINEX VERSION / TYPE" in line:
+            header['version'] = float(line.split()[0])
+            header['filetype'] = line[20]
+            # RINEX 2 files give the system through the file type letter only
+            if header['version'] >= 3:
+                header['system'] = line[40] if line[40] != ' ' else 'G'
+            else:
+                header['system'] = _V2_SYSTEMS.get(line[20].upper(), 'G')
+    return header
+
+
+def read_records(f, header):
+    """
+    Read GPS/QZSS navigation records from the body of a RINEX 2 or 3 file.
+
+    Args:
+        f: Open text file positioned just after END OF HEADER
+        header (dict): Header returned by read_header
+
+    Returns:
+        list: One dict per ephemeris with 'Satellite', 'Epoch Time' and field values
+    """
+    v3 = header['version'] >= 3
+    records = []
+    for line in f:
+        if v3:
+            prn = line[:3].strip()
+            if not prn:
+                continue
+            dt = epoch_time(line[4:8], line[9:11], line[12:14], line[15:17], line[18:20], line[21:23])
+            raw_data = [line[23:].strip()]
+        else:
+            prn_str = line[:2].strip()
+            if not prn_str.isdigit():
+                continue
+            prn = f"{header['system']}{int(prn_str):02d}"
+            dt = epoch_time(line[3:5], line[6:8], line[9:11], line[12:14], line[15:17], line[17:22])
+            raw_data = [line[22:].strip()]
+
+        # Collect raw data across multiple lines
+        for _ in range(_RECORD_LINES):
+            extra_line = f.readline()
+            if not extra_line:
+                break
+            raw_data.append(extra_line.strip())
+
+        # Extract numerical values, ignoring the spare fields at the end
+        entry = {"Satellite": prn, "Epoch Time": dt}
+        for k, v in zip(NAV_FIELDS, extract_numbers(" ".join(raw_data))):
+            entry[k] = float(v)
+        records.append(entry)
+    return records
+
+
+def decode_fields(blob, num_fields):
+    """
+    Decode a buffer of fixed-width 19-character numeric fields in one pass.
+
+    D exponents are converted for the whole buffer at once and blank fields
+    become NaN, so fields that touch without a separating space still parse.
+
+    Args:
+        blob (bytes): Concatenated fields, num_fields per record
+        num_fields (int): Number of fields per record
+
+    Returns:
+        np.ndarray: float64 array of shape [records x num_fields]
+    """
+    fields = np.frombuffer(blob.replace(b'D', b'E').replace(b'd', b'e'), dtype=f'S{_FIELD_WIDTH}').copy()
+    fields[fields == b' ' * _FIELD_WIDTH] = b'nan'
+    return fields.astype(np.float64).reshape(-1, num_fields)
+
+
+def _decode_epochs(headers, version):
+    """
+    Decode PRN/epoch headers into year..second arrays and a datetime64[ns] array.
+    """
+    h = np.frombuffer(headers, dtype=_HEADER_DTYPE[version])
+    year = h['year'].astype(np.int64)
+    if version < 3:
+        year = np.where(year >= 80, year + 1900, year + 2000)
+    month = h['month'].astype(np.int64)
+    seconds = (h['day'].astype(np.int64) - 1) * 86400 + h['hour'].astype(np.int64) * 3600 \
+        + h['minute'].astype(np.int64) * 60
+    ns = np.round(h['second'].astype(np.float64) * 1e9).astype(np.int64) + seconds * 10**9
+
+    months = (year - 1970) * 12 + month - 1
+    epoch = months.astype('datetime64[M]').astype('datetime64[ns]') + ns.astype('timedelta64[ns]')
+    return h['prn'], epoch
+
+
+def _continuation_lines(fields):
+    """
+    Number of continuation lines of a record with the given field layout.
+    """
+    return -(-(len(fields) - (_FIELDS_PER_LINE - 1)) // _FIELDS_PER_LINE)
+
+
+def read_records_fixed(lines, header, select=None):
+    """
+    Decode navigation records of every system by slicing their fixed-width columns.
+
+    A single pass over the lines sorts each record into its system's buffer
+    (GPS/QZSS/Galileo/BeiDou/IRNSS records have 7 continuation lines,
+    GLONASS/SBAS have 3).  Each buffer is then decoded at once: all PRN/epoch
+    headers through a structured bytes dtype and all numeric fields into a
+    preallocated float64 array, instead of one regular expression per record.
+
+    Args:
+        lines (list): Body lines (after END OF HEADER)
+        header (dict): Header returned by read_header
+        select (callable, optional): Predicate on the PRN ('G05', 'E11', ...);
+            records it rejects are skipped before decoding
+
+    Returns:
+        dict: System letter -> wide ephemeris table
+    """
+    version = 3 if header['version'] >= 3 else 2
+    head = _LAYOUT[version]['header']
+    indent = _LAYOUT[version]['indent']
+    first_width = (_FIELDS_PER_LINE - 1) * _FIELD_WIDTH
+    line_width = _FIELDS_PER_LINE * _FIELD_WIDTH
+
+    buffers = {}
+    i, n = 0, len(lines)
+    while i < n:
+        line = lines[i]
+        if version == 3:
+            system = line[:1]
+            is_record = system in SYSTEM_FIELDS
+            prn = line[:3]
+        else:
+            system = header['system']
+            is_record = line[:2].strip().isdigit()
+            prn = f'{system}{line[:2].strip():0>2}'
+        if not is_record:
+            i += 1
+            continue
+        num_lines = _continuation_lines(SYSTEM_FIELDS[system])
+        if i + num_lines >= n or (select is not None and not select(prn)):
+            i += 1 + num_lines
+            continue
+
+        headers, fields = buffers.setdefault(system, ([], []))
+        headers.append(line[:head].ljust(head))
+        fields.append(line[head:head + first_width].ljust(first_width))
+        for extra_line in lines[i + 1:i + 1 + num_lines]:
+            fields.append(extra_line[indent:indent + line_width].ljust(line_width))
+        i += 1 + num_lines
+
+    tables = {}
+    for system, (headers, fields) in buffers.items():
+        layout = SYSTEM_FIELDS[system]
+        num_fields = (_FIELDS_PER_LINE - 1) + _continuation_lines(layout) * _FIELDS_PER_LINE
+        values = decode_fields(''.join(fields).encode('ascii'), num_fields)
+        prn, epoch = _decode_epochs(''.join(headers).encode('ascii'), version)
+
+        if version == 3:
+            satellite = prn.astype(str)
+        else:
+            satellite = np.char.add(system, np.char.zfill(prn.astype(np.int64).astype(str), 2))
+
+        columns = {'Satellite': satellite, 'Epoch Time': epoch}
+        columns.update((k, values[:, j]) for j, k in enumerate(layout) if k is not None)
+        tables[system] = to_table(columns, [k for k in layout if k is not None])
+        count('records', len(tables[system]))
+    return tables
+
+
+def read_nav_tables(file, select=None):
+    """
+    Read every system of a RINEX 2 or 3 navigation file in a single pass.
+
+    Args:
+        file (str): Path to the RINEX navigation message file
+        select (callable, optional): Predicate on the PRN, applied at read time,
+            e.g. ``lambda prn: prn[0] in 'GE'``
+
+    Returns:
+        dict: System letter ('G', 'J', 'E', 'C', 'R', 'S', 'I') -> wide ephemeris table
+    """
+    with open(file, 'r', encoding='utf-8') as f:
+        with stage('header scan'):
+            header = read_header(f)
+        with stage('body parse'):
+            return read_records_fixed(f.read().splitlines(), header, select)
+
+
+def read_nav(file, method='fixed', select=None):
+    """
+    Read the GPS/QZSS records of a RINEX 2 or 3 navigation file into one wide ephemeris table.
+
+    Args:
+        file (str): Path to the RINEX navigation message file
+        method (str): 'fixed' to slice the 19-character columns directly (default),
+            or 'regex' for the original regular-expression extraction
+        select (callable, optional): Predicate on the PRN, applied at read time
+
+    Returns:
+        pd.DataFrame: One row per ephemeris (see gnss.nav_store.to_table)
+    """
+    with open(file, 'r', encoding='utf-8') as f:
+        with stage('header scan'):
+            header = read_header(f)
+        with stage('body parse'):
+            if method == 'regex':
+                records = read_records(f, header)
+                count('records', len(records))
+                return to_table(records)
+            tables = read_records_fixed(f.read().splitlines(), header,
+                                        lambda prn: prn[0] in 'GJ' and (select is None or select(prn)))
+    if not tables:
+        return to_table([])
+    return to_table(pd.concat([tables[system] for system in sorted(tables)], ignore_index=True))
@@ -0,0 +1,273 @@
+from collections import namedtuple
+
+import numpy as np
+
+from gnss.instrument import count, stage
+
+# One observation epoch: time (numpy.datetime64), epoch flag, PRN array and
+# an [satellite x obs-type] float64 matrix with NaN for blank fields.
+ObsEpoch = namedtuple('ObsEpoch', ['time', 'flag', 'prns', 'obs'])
+
+# RINEX 2 layout: 5 observations of 16 characters per line, 12 PRNs per epoch line
+_V2_OBS_PER_LINE = 5
+_V2_SATS_PER_LINE = 12
+# RINEX 3 layout: 13 observation types per SYS / # / OBS TYPES line
+_V3_TYPES_PER_LINE = 13
+_OBS_WIDTH = 16
+_VALUE_WIDTH = 14
+
+
+def read_header(f):
+    """
+    Read a RINEX observation header from an open file, stopping after END OF HEADER.
+
+    Args:
+        f: Open text file (or any line iterator) positioned at the start of the file
+
+    Returns:
+        dict: Header information ('version', 'filetype', 'system', 'obs_types',
+            and 'position', 'interval', 'first_obs' when present).  For RINEX 3
+            'sys_obs_types' maps each system to its own list and 'obs_types'
+            is the union of all of them in order of first appearance.
+    """
+    with stage('header scan'):
+        return _read_header(f)
+
+
+def _read_header(f):
+    """
+    Parse the header lines (see read_header).
+    """
+    header = {'obs_types': [], 'sys_obs_types': {}}
+    remaining = 0
+    system = None
+    for line in f:
+        label = line[60:].strip()
+        if label == "END OF HEADER":
+            break
+        elif label == "RINEX VERSION / TYPE":
+            header['version'] = float(line[:9])
+            header['filetype'] = line[20]
+            header['system'] = line[40] if line[40] != ' ' else 'G'
+        elif label == "# / TYPES OF OBSERV":
+            # The list continues on extra lines when there are more than 9 types
+            if remaining == 0:
+                remaining = int(line[:6])
+            types = line[6:60].split()
+            header['obs_types'].extend(types)
+            remaining -= len(types)
+        elif label == "SYS / # / OBS TYPES":
+            # Continuation lines leave the system and count columns blank
+            if line[0] != ' ':
+                system = line[0]
+                header['sys_obs_types'][system] = []
+            types = line[7:60].split()
+            header['sys_obs_types'][system].extend(types)
+            header['obs_types'].extend(t for t in types if t not in header['obs_types'])
+        elif label == "APPROX POSITION XYZ":
+            header['position'] = [float(line[:14]), float(line[14:28]), float(line[28:42])]
+        elif label == "TIME OF FIRST OBS":
+            header['first_obs'] = [int(line[:6]), int(line[6:12]), int(line[12:18]),
+                                   int(line[18:24]), int(line[24:30]), float(line[30:43])]
+        elif label == "INTERVAL":
+            header['interval'] = float(line[:10])
+    return header
+
+
+def epoch_time(year, month, day, hour, minute, second):
+    """
+    Build a numpy.datetime64 (ns) from RINEX epoch fields.
+    """
+    year = int(year)
+    if 80 <= year <= 99:
+        year += 1900
+    elif year < 80:  # because we might pass in four-digit year
+        year += 2000
+    ns = int(round(float(second) * 1e9))
+    return (np.datetime64(f'{year:04d}-{int(month):02d}-{int(day):02d}T{int(hour):02d}:{int(minute):02d}', 'ns')
+            + np.timedelta64(ns, 'ns'))
+
+
+def _prn(code, default_system):
+    """
+    Normalise a 3-character RINEX satellite code ('G 7', ' 7', 'G07') to 'G07'.
+    """
+    system = code[0] if code[0] != ' ' else default_system
+    return f'{system}{int(code[1:3]):02d}'
+
+
+def iter_epochs_v2(f, header, obs_types=None, select=None):
+    """
+    Yield observation epochs from the body of a RINEX 2.x observation file.
+
+    Only one epoch block is held in memory at a time.  Satellite lists longer
+    than 12 PRNs and observation records longer than 5 types are read from
+    their continuation lines.  Event records (flags 2-5) and cycle-slip
+    records (flag 6) are skipped.
+
+    Args:
+        f: Open text file positioned just after END OF HEADER
+        header (dict): Header returned by read_header
+        obs_types (list, optional): Observation types to keep, in this order
+            (default: all types in the header)
+        select (callable, optional): Predicate on the PRN ('G05', ...); rejected
+            satellites are dropped from the yielded epochs
+
+    Returns:
+        generator: ObsEpoch tuples
+    """
+    all_types = header['obs_types']
+    num_obs = len(all_types)
+    columns = [all_types.index(t) for t in (obs_types or all_types)]
+    lines_per_sat = -(-num_obs // _V2_OBS_PER_LINE)
+    default_system = header.get('system', 'G')
+    if default_system == 'M':
+        default_system = 'G'
+
+    for line in f:
+        if len(line) < 32 or not line[29:32].strip():
+            continue
+        flag = int(line[28]) if line[28].strip() else 0
+        num_of_sat = int(line[29:32])
+
+        if flag > 1 and flag != 6:
+            # Special records: num_of_sat is the number of header lines that follow
+            for _ in range(num_of_sat):
+                f.readline()
+            continue
+
+        epoch = epoch_time(line[1:3], line[4:6], line[7:9], line[10:12], line[13:15], line[15:26])
+
+        # Satellite list continues on extra lines for more than 12 SVs
+        sat_field = line[32:68]
+        for _ in range(1, -(-num_of_sat // _V2_SATS_PER_LINE)):
+            sat_field += f.readline()[32:68]
+        prns = np.array([_prn(sat_field[3 * i:3 * i + 3], default_system) for i in range(num_of_sat)])
+
+        obs = np.full((num_of_sat, len(columns)), np.nan)
+        for i in range(num_of_sat):
+            record = ''.join(f.readline().rstrip('\r\n').ljust(_OBS_WIDTH * _V2_OBS_PER_LINE)
+                             for _ in range(lines_per_sat))
+            for j, col in enumerate(columns):
+                raw_value = record[col * _OBS_WIDTH:col * _OBS_WIDTH + _VALUE_WIDTH]
+                if raw_value.strip():
+                    obs[i, j] = float(raw_value)
+
+        if flag == 6:
+            continue
+        if select is not None:
+            keep = np.array([select(prn) for prn in prns], dtype=bool)
+            prns, obs = prns[keep], obs[keep]
+        count('epochs')
+        count('satellites', len(prns))
+        yield ObsEpoch(epoch, flag, prns, obs)
+
+
+def iter_epochs_v3(f, header, obs_types=None, select=None):
+    """
+    Yield observation epochs from the body of a RINEX 3.x observation file.
+
+    Each system has its own observation type list in RINEX 3; the yielded
+    matrix uses one common column layout (``obs_types``) and leaves NaN where
+    a system does not record that type.  Event records (flags 2-5) are skipped.
+
+    Args:
+        f: Open text file positioned just after END OF HEADER
+        header (dict): Header returned by read_header
+        obs_types (list, optional): Observation types to keep, in this order
+            (default: union of all types in the header)
+        select (callable, optional): Predicate on the PRN ('G05', 'E11', ...);
+            rejected satellites are skipped before their values are decoded
+
+    Returns:
+        generator: ObsEpoch tuples
+    """
+    obs_types = obs_types or header['obs_types']
+    # Per-system (value offset, output column) pairs
+    layouts = {}
+    for system, types in header['sys_obs_types'].items():
+        layouts[system] = [(3 + types.index(t) * _OBS_WIDTH, j) for j, t in enumerate(obs_types) if t in types]
+
+    for line in f:
+        if not line.startswith('>'):
+            continue
+        flag = int(line[31]) if line[31].strip() else 0
+        num_of_sat = int(line[32:35])
+
+        if flag > 1:
+            # Special records: num_of_sat is the number of header lines that follow
+            for _ in range(num_of_sat):
+                f.readline()
+            continue
+
+        epoch = epoch_time(line[2:6], line[7:9], line[10:12], line[13:15], line[16:18], line[18:29])
+
+        prns = []
+        obs = np.full((num_of_sat, len(obs_types)), np.nan)
+        for _ in range(num_of_sat):
+            record = f.readline()
+            system = record[0]
+            prn = f'{system}{int(record[1:3]):02d}'
+            if select is not None and not select(prn):
+                continue
+            row = obs[len(prns)]
+            prns.append(prn)
+            for start, j in layouts.get(system, ()):
+                raw_value = record[start:start + _VALUE_WIDTH]
+                if raw_value.strip():
+                    row[j] = float(raw_value)
+
+        count('epochs')
+        count('satellites', len(prns))
+        yield ObsEpoch(epoch, flag, np.array(prns, dtype='U3'), obs[:len(prns)])
+
+
+def iter_epochs(f, header, obs_types=None, select=None):
+    """
+    Yield observation epochs from an open file using the reader for its RINEX version.
+    """
+    if header['version'] >= 3:
+        return iter_epochs_v3(f, header, obs_types, select)
+    return iter_epochs_v2(f, header, obs_types, select)
+
+
+def read_epochs(file, obs_types=None, select=None):
+    """
+    Stream observation epochs from a RINEX 2 or 3 observation file.
+
+    Args:
+        file (str): Path to the RINEX observation file
+        obs_types (list, optional): Observation types to keep, in this order
+        select (callable, optional): Predicate on the PRN, applied at read time
+
+    Returns:
+        generator: ObsEpoch tuples, one per epoch block
+    """
+    with open(file, 'r') as f:
+        header = read_header(f)
+        yield from iter_epochs(f, header, obs_types, select)
+
+
+def stack_epochs(epochs):
+    """
+    Stack observation epochs into dense [epoch x satellite x obs-type] arrays.
+
+    The in-memory counterpart of gnss.obs_cube for whole-file processing
+    without a cube directory.
+
+    Args:
+        epochs (iterable): ObsEpoch tuples with the same observation columns
+
+    Returns:
+        tuple: Epoch times (datetime64[ns], [E]), sorted PRNs [S] and
+            observations [E, S, T] with NaN for missing values
+    """
+    epochs = list(epochs)
+    if not epochs:
+        return np.array([], dtype='datetime64[ns]'), np.array([], dtype=str), np.empty((0, 0, 0))
+    prns = np.unique(np.concatenate([e.prns for e in epochs]))
+    obs = np.full((len(epochs), len(prns), epochs[0].obs.shape[1]), np.nan)
+    for i, e in enumerate(epochs):
+        obs[i, np.searchsorted(prns, e.prns)] = e.obs
+    times = np.array([e.time for e in epochs], dtype='datetime64[ns]')
+    return times, prns, obs
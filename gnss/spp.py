@@ -0,0 +1,217 @@
+from collections import namedtuple
+
+import numpy as np
+
+from gnss import cycle_slip, hatch
+from gnss.cache import satellite_states
+from gnss.constants import C, OMEGA_E
+from gnss.ephemeris import EphemerisArray
+from gnss.ephemeris_index import EphemerisIndex
+from gnss.geodesy import ecef_to_geodetic, enu_rotation
+from gnss.orbit import gps_seconds
+from gnss.rinex_obs import stack_epochs
+
+# Gauss-Newton from the Earth's centre converges in about 6 iterations
+MAX_ITERATIONS = 10
+TOLERANCE = 1e-4  # [m]
+
+# Unknowns per epoch: X, Y, Z and the receiver clock bias
+NUM_UNKNOWNS = 4
+
+SppSolution = namedtuple('SppSolution', ['time', 'position', 'clock', 'residuals', 'num_sats', 'dop', 'valid',
+                                         'satellites'])
+SppSolution.__doc__ = """
+Batched single-point positioning result.
+
+Fields:
+    time (np.ndarray): Epoch times, datetime64[ns], shape [E]
+    position (np.ndarray): Receiver ECEF position [m], shape [E, 3]
+    clock (np.ndarray): Receiver clock bias times C [m], shape [E]
+    residuals (np.ndarray): Pseudorange residuals [m], shape [E, S], NaN for unused satellites
+    num_sats (np.ndarray): Satellites used per epoch, shape [E]
+    dop (dict): 'GDOP', 'PDOP', 'HDOP', 'VDOP' and 'TDOP' arrays, shape [E]
+    valid (np.ndarray): Epochs with at least 4 satellites, shape [E]
+    satellites (np.ndarray): Satellite ECEF positions at transmission time [m], shape [E, S, 3], NaN for unused
+"""
+
+
+def _geometry(sat, x, used):
+    """
+    Modelled ranges (with the Sagnac correction) and the design matrix.
+
+    Args:
+        sat (np.ndarray): Satellite positions at transmission time, [E, S, 3]
+        x (np.ndarray): Current state (X, Y, Z, clock), [E, 4]
+        used (np.ndarray): Mask of usable measurements, [E, S]
+
+    Returns:
+        tuple: (modelled pseudoranges [E, S], design matrix [E, S, 4])
+    """
+    d = sat - x[:, None, :3]
+    rho = np.where(used, np.linalg.norm(d, axis=2), 1.0)
+
+    # Earth rotation during the signal flight, applied as a range correction
+    sagnac = OMEGA_E * (sat[..., 0] * x[:, None, 1] - sat[..., 1] * x[:, None, 0]) / C
+
+    G = np.empty(d.shape[:2] + (NUM_UNKNOWNS,))
+    G[..., :3] = -d / rho[..., None]
+    G[..., 3] = 1.0
+    return rho + sagnac + x[:, None, 3], G
+
+
+def solve(times, prns, pseudorange, nav_table, index=None, x0=None, cache=None,
+          iterations=MAX_ITERATIONS, tol=TOLERANCE, min_sats=NUM_UNKNOWNS, visibility=None):
+    """
+    Solve receiver positions for every epoch with batched iterative least squares.
+
+    Each pseudorange is corrected for the satellite clock (polynomial,
+    relativistic term and TGD) and the satellite position is propagated to
+    the transmission time.  All epochs are then solved together: every
+    Gauss-Newton step builds the [E, 4, 4] normal equations with einsum and
+    solves them in one np.linalg.solve call.  Ionosphere and troposphere are
+    not modelled, so their delays remain in the residuals.
+
+    Args:
+        times (array_like): Epoch times (datetime64), shape [E]
+        prns (array_like): Satellite IDs of the pseudorange columns, shape [S]
+        pseudorange (array_like): Code pseudoranges [m], shape [E, S], NaN where missing
+        nav_table (EphemerisArray or pd.DataFrame): Ephemerides (see gnss.ephemeris)
+        index (EphemerisIndex, optional): Prebuilt index over nav_table
+        x0 (array_like, optional): Initial ECEF position [m] (default: Earth's centre)
+        cache (PositionCache, optional): Cache for the propagated satellite states
+        iterations (int): Maximum number of Gauss-Newton iterations
+        tol (float): Stop when every epoch's position update is below tol [m]
+        min_sats (int): Minimum number of satellites for a solution
+        visibility (VisibilityIndex, optional): Drop satellites below its
+            elevation mask before anything is propagated (see gnss.visibility)
+
+    Returns:
+        SppSolution
+    """
+    times = np.asarray(times, dtype='datetime64[ns]')
+    P = np.asarray(pseudorange, dtype=np.float64)
+    num_epochs, num_sats = P.shape
+    nav_table = EphemerisArray.from_table(nav_table)
+    if index is None:
+        index = EphemerisIndex(nav_table)
+
+    # Match every (epoch, satellite) pair to its ephemeris
+    t_rx = gps_seconds(times)
+    rows = index.lookup(np.asarray(prns, dtype=str)[None, :], t_rx[:, None])
+    used = (rows >= 0) & np.isfinite(P) & (P > 0)
+    if visibility is not None:
+        used &= visibility.visible(np.asarray(prns, dtype=str)[None, :], t_rx[:, None])
+    epoch_idx, sat_idx = np.nonzero(used)
+    r = rows[epoch_idx, sat_idx]
+    p = P[epoch_idx, sat_idx]
+    states = cache.states if cache is not None else satellite_states
+
+    # Transmission time in GPS time: the pseudorange gives it in satellite
+    # time, which is then corrected by the satellite clock offset
+    t_tx = t_rx[epoch_idx] - p / C
+    dts = states(nav_table, r, t_tx)[3]
+    X, Y, Z, dts = states(nav_table, r, t_tx - dts)
+    dts = dts - np.nan_to_num(nav_table['TGD'][r])
+
+    sat = np.zeros((num_epochs, num_sats, 3))
+    sat[epoch_idx, sat_idx] = np.stack([X, Y, Z], axis=-1)
+    corrected = np.zeros((num_epochs, num_sats))
+    corrected[epoch_idx, sat_idx] = p + C * dts
+
+    count = used.sum(axis=1)
+    valid = count >= min_sats
+    w = used.astype(np.float64)
+    identity = np.eye(NUM_UNKNOWNS)
+
+    # Batched Gauss-Newton iterations
+    x = np.zeros((num_epochs, NUM_UNKNOWNS))
+    if x0 is not None:
+        x[:, :3] = x0
+    for _ in range(iterations):
+        modelled, G = _geometry(sat, x, used)
+        v = np.where(used, corrected - modelled, 0.0)
+        N = np.einsum('esi,es,esj->eij', G, w, G)
+        N[~valid] = identity
+        b = np.einsum('esi,es->ei', G, w * v)
+        dx = np.linalg.solve(N, b[..., None])[..., 0]
+        dx[~valid] = 0.0
+        x += dx
+        if not np.any(np.abs(dx[:, :3]) > tol):
+            break
+
+    # Residuals and DOP at the final solution
+    modelled, G = _geometry(sat, x, used)
+    residuals = np.where(used, corrected - modelled, np.nan)
+    N = np.einsum('esi,es,esj->eij', G, w, G)
+    N[~valid] = identity
+    Q = np.linalg.inv(N)
+    R = enu_rotation(*ecef_to_geodetic(x[:, 0], x[:, 1], x[:, 2])[:2])
+    Q_enu = np.einsum('eij,ejk,elk->eil', R, Q[:, :3, :3], R)
+    dop = {
+        'GDOP': np.sqrt(np.trace(Q, axis1=1, axis2=2)),
+        'PDOP': np.sqrt(np.trace(Q[:, :3, :3], axis1=1, axis2=2)),
+        'HDOP': np.sqrt(Q_enu[:, 0, 0] + Q_enu[:, 1, 1]),
+        'VDOP': np.sqrt(Q_enu[:, 2, 2]),
+        'TDOP': np.sqrt(Q[:, 3, 3]),
+    }
+
+    # Epochs without a solution are reported as NaN
+    position = np.where(valid[:, None], x[:, :3], np.nan)
+    clock = np.where(valid, x[:, 3], np.nan)
+    residuals[~valid] = np.nan
+    dop = {k: np.where(valid, v, np.nan) for k, v in dop.items()}
+    sat[~used] = np.nan
+    return SppSolution(times, position, clock, residuals, count, dop, valid, sat)
+
+
+def solve_cube(cube, nav_table, obs_type='C1C', index=None, x0=None, cache=None, hatch_window=None, **kwargs):
+    """
+    Solve every epoch of an observation cube (see gnss.obs_cube).
+
+    Args:
+        cube (ObsCube): Observation cube
+        nav_table (EphemerisArray or pd.DataFrame): Ephemerides
+        obs_type (str): Code observation used as pseudorange ('C1C', or 'C1' for RINEX 2)
+        index (EphemerisIndex, optional): Prebuilt index over nav_table
+        x0 (array_like, optional): Initial position (default: the header's approximate position)
+        cache (PositionCache, optional): Cache for the propagated satellite states
+        hatch_window (int, optional): Smooth the pseudoranges with the carrier
+            phase of the same signal over this many samples (see gnss.hatch)
+
+    Returns:
+        SppSolution
+    """
+    if x0 is None:
+        x0 = cube.meta.get('position')
+    if hatch_window:
+        pseudorange = hatch.smooth_cube(cube, obs_type, hatch.phase_type(obs_type), hatch_window)
+    else:
+        pseudorange = cube.obs_slice(obs_type)
+    return solve(cube.times, cube.prns, pseudorange, nav_table, index, x0, cache, **kwargs)
+
+
+def solve_epochs(epochs, nav_table, index=None, x0=None, cache=None, hatch_window=None, **kwargs):
+    """
+    Solve observation epochs held in memory (see gnss.rinex_obs.iter_epochs).
+
+    Args:
+        epochs (iterable): ObsEpoch tuples whose first observation column is the
+            pseudorange (and the second its carrier phase with hatch_window)
+        nav_table (EphemerisArray or pd.DataFrame): Ephemerides
+        index (EphemerisIndex, optional): Prebuilt index over nav_table
+        x0 (array_like, optional): Initial ECEF position [m] (default: Earth's centre)
+        cache (PositionCache, optional): Cache for the propagated satellite states
+        hatch_window (int, optional): Carrier-smoothing window [samples] (see gnss.hatch)
+
+    Returns:
+        SppSolution
+    """
+    times, prns, obs = stack_epochs(epochs)
+    if not len(times):
+        P = np.empty((0, 0))
+    elif hatch_window:
+        slips = cycle_slip.detect(times, obs[:, :, 0], obs[:, :, 1])
+        P = hatch.smooth(obs[:, :, 0], obs[:, :, 1], slips.arc, hatch_window)
+    else:
+        P = obs[:, :, 0]
+    return solve(times, prns, P, nav_table, index, x0, cache, **kwargs)
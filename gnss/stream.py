@@ -0,0 +1,320 @@
+"""
+Streaming positioning service fed with RINEX 3 text over a socket.
+
+A feed is plain RINEX 3 text: an observation header, then observation epoch
+blocks ('>' epoch line followed by one line per satellite) and navigation
+records, in any order.  Navigation records keep a hot ephemeris set up to
+date (records are merged in batches, before the next epoch is solved);
+every epoch block is solved as soon as it arrives and one JSON line
+with the satellite positions and the SPP fix is written per epoch.
+
+Usage:
+    python -m gnss.stream serve --port 9000
+    python -m gnss.stream replay ../data/GPS_obs_3_02.rnx --nav ../data/GPS_nav_3.02.rnx --port 9000 --speed 10
+"""
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from gnss import rinex_nav, rinex_obs
+from gnss.ephemeris import EphemerisArray
+from gnss.ephemeris_index import EphemerisIndex
+from gnss.nav_store import SYSTEM_FIELDS, to_table
+from gnss.spp import solve
+
+# Ephemerides older than this, relative to the newest one, are dropped [s]
+EPHEMERIS_RETENTION = 86400
+
+# Navigation records buffered before they are merged without waiting for an epoch
+NAV_BATCH = 1000
+
+# Epochs waiting longer than this are dropped instead of solved [s]
+MAX_LATENCY = 1.0
+QUEUE_SIZE = 64
+
+_NAV_HEADER = {'version': 3.0, 'system': 'M'}
+
+
+def _is_nav_record(line):
+    """
+    Whether a line outside an epoch block starts a RINEX 3 navigation record ('G05 2025 03 11 ...').
+    """
+    return line[:1] in SYSTEM_FIELDS and line[3:4] == ' ' and line[4:8].isdigit()
+
+
+def _nav_record_lines(line):
+    """
+    Number of lines (including the first) of the navigation record starting with line.
+    """
+    return 1 + -(-(len(SYSTEM_FIELDS[line[0]]) - 3) // 4)
+
+
+class PositioningService:
+    """
+    Solve observation epochs from socket feeds against a hot ephemeris set.
+    """
+
+    def __init__(self, output=None, obs_type='C1C', max_latency=MAX_LATENCY, queue_size=QUEUE_SIZE):
+        """
+        Args:
+            output (file, optional): Text stream receiving one JSON line per epoch (default: stdout)
+            obs_type (str): Code observation used as pseudorange
+            max_latency (float): Epochs queued for longer than this are dropped [s]
+            queue_size (int): Epochs buffered between the readers and the solver
+        """
+        self.output = output or sys.stdout
+        self.obs_type = obs_type
+        self.max_latency = max_latency
+        self.queue_size = queue_size
+        self.queue = None
+        self.nav_table = None
+        self.ephemerides = None
+        self.index = None
+        self.pending_nav = []
+        self.pending_records = 0
+        self.stats = {'epochs': 0, 'dropped': 0, 'nav_records': 0, 'connections': 0}
+
+    def add_nav(self, lines):
+        """
+        Queue navigation record lines for the hot ephemeris set.
+
+        Records are merged by merge_nav() before the next epoch is solved, or
+        once NAV_BATCH records are waiting, so a burst of broadcasts costs one
+        rebuild instead of one per record.
+
+        Args:
+            lines (list): Complete RINEX 3 navigation records
+        """
+        self.pending_nav.extend(lines)
+        self.pending_records += sum(1 for line in lines if _is_nav_record(line))
+        if self.pending_records >= NAV_BATCH:
+            self.merge_nav()
+
+    def merge_nav(self):
+        """
+        Merge the queued navigation records into the hot ephemeris set (GPS/QZSS).
+        """
+        lines, self.pending_nav, self.pending_records = self.pending_nav, [], 0
+        tables = rinex_nav.read_records_fixed(lines, _NAV_HEADER, lambda prn: prn[0] in 'GJ')
+        if not tables:
+            return
+        self.stats['nav_records'] += sum(len(t) for t in tables.values())
+        chunks = list(tables.values())
+        if self.nav_table is not None:
+            chunks.insert(0, self.nav_table)
+        table = pd.concat(chunks, ignore_index=True)
+
+        # Repeated broadcasts of the same ephemeris collapse to one row
+        table = table.drop_duplicates(subset=['Satellite', 'Epoch Time', 'IODE', 'TransTime'], keep='last')
+        toe = table['GPSWeek'] * 604800 + table['Toe']
+        table = table[toe >= toe.max() - EPHEMERIS_RETENTION]
+        self.nav_table = to_table(table)
+        self.ephemerides = EphemerisArray.from_table(self.nav_table)
+        self.index = EphemerisIndex(self.ephemerides)
+
+    def solve_epoch(self, epoch):
+        """
+        Compute satellite positions and the SPP fix of one epoch.
+
+        Args:
+            epoch (ObsEpoch): Epoch with a single observation column (obs_type)
+
+        Returns:
+            dict: JSON-serialisable result
+        """
+        result = {'time': str(epoch.time.astype('datetime64[ms]')), 'num_sats': 0}
+        if self.pending_nav:
+            self.merge_nav()
+        if self.index is None or len(epoch.prns) == 0:
+            return result
+        sol = solve(epoch.time[None], epoch.prns, epoch.obs[None, :, 0], self.ephemerides, self.index)
+        sats = sol.satellites[0]
+        result['satellites'] = {prn: xyz.round(3).tolist() for prn, xyz in zip(epoch.prns.tolist(), sats)
+                                if np.isfinite(xyz[0])}
+        result['num_sats'] = int(sol.num_sats[0])
+        if sol.valid[0]:
+            result['position'] = sol.position[0].round(3).tolist()
+            result['clock'] = round(float(sol.clock[0]), 3)
+            result['dop'] = {k: round(float(v[0]), 3) for k, v in sol.dop.items()}
+        return result
+
+    def _enqueue(self, item):
+        # Bounded queue: when the solver falls behind, the oldest epoch is dropped
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.stats['dropped'] += 1
+        self.queue.put_nowait(item)
+
+    async def handle(self, reader, writer):
+        """
+        Read one feed connection until it closes.
+        """
+        self.stats['connections'] += 1
+        header_lines, header = [], None
+        try:
+            while True:
+                line = (await reader.readline()).decode('latin-1')
+                if not line:
+                    break
+                if header_lines or line[60:].strip() == 'RINEX VERSION / TYPE':
+                    # Header block: only an observation header sets the layout
+                    header_lines.append(line)
+                    if line[60:].strip() == 'END OF HEADER':
+                        parsed = rinex_obs.read_header(iter(header_lines))
+                        header_lines = []
+                        if parsed.get('filetype') == 'O':
+                            header = parsed
+                    continue
+                if line.startswith('>'):
+                    block = [line]
+                    for _ in range(int(line[32:35])):
+                        block.append((await reader.readline()).decode('latin-1'))
+                    if header is not None:
+                        self._enqueue((time.perf_counter(), header, ''.join(block)))
+                elif _is_nav_record(line):
+                    record = [line.rstrip('\r\n')]
+                    for _ in range(_nav_record_lines(line) - 1):
+                        record.append((await reader.readline()).decode('latin-1').rstrip('\r\n'))
+                    self.add_nav(record)
+        finally:
+            writer.close()
+
+    async def solver(self):
+        """
+        Solve queued epochs, dropping those that waited longer than max_latency.
+        """
+        while True:
+            received, header, block = await self.queue.get()
+            if time.perf_counter() - received > self.max_latency:
+                self.stats['dropped'] += 1
+                continue
+            for epoch in rinex_obs.iter_epochs_v3(io.StringIO(block), header, [self.obs_type]):
+                result = self.solve_epoch(epoch)
+                result['latency_ms'] = round((time.perf_counter() - received) * 1e3, 3)
+                self.output.write(json.dumps(result) + '\n')
+                self.stats['epochs'] += 1
+            self.output.flush()
+
+    async def serve(self, host='127.0.0.1', port=9000, path=None):
+        """
+        Accept feed connections on a TCP port (or a Unix socket path) forever.
+        """
+        self.queue = asyncio.Queue(self.queue_size)
+        if path:
+            server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        solver = asyncio.ensure_future(self.solver())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            solver.cancel()
+
+
+def _epoch_blocks(f):
+    """
+    Yield (epoch time, raw text) for every epoch block in a RINEX 3 observation body.
+    """
+    for line in f:
+        if not line.startswith('>'):
+            continue
+        block = [line] + [f.readline() for _ in range(int(line[32:35]))]
+        t = rinex_obs.epoch_time(line[2:6], line[7:9], line[10:12], line[13:15], line[16:18], line[18:29])
+        yield t, ''.join(block)
+
+
+async def replay(obs_file, nav_file=None, host='127.0.0.1', port=9000, path=None, speed=1.0):
+    """
+    Stream a RINEX 3 observation file (and navigation file) to a running service.
+
+    The navigation body is sent first, then the observation header and every
+    epoch block, paced by the epoch timestamps.
+
+    Args:
+        obs_file (str): RINEX 3 observation file
+        nav_file (str, optional): RINEX 3 navigation file
+        host (str): Service host
+        port (int): Service TCP port
+        path (str, optional): Unix socket path (instead of host/port)
+        speed (float): Replay speed factor (0 sends as fast as possible)
+
+    Returns:
+        int: Number of epoch blocks sent
+    """
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    if nav_file:
+        with open(nav_file, 'r') as f:
+            rinex_nav.read_header(f)
+            writer.write(f.read().encode('latin-1'))
+        await writer.drain()
+
+    sent = 0
+    with open(obs_file, 'r') as f:
+        for line in f:
+            writer.write(line.encode('latin-1'))
+            if line[60:].strip() == 'END OF HEADER':
+                break
+        start, first = time.perf_counter(), None
+        for t, block in _epoch_blocks(f):
+            if speed > 0:
+                first = t if first is None else first
+                delay = (t - first) / np.timedelta64(1, 's') / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            writer.write(block.encode('latin-1'))
+            await writer.drain()
+            sent += 1
+
+    writer.close()
+    await writer.wait_closed()
+    return sent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming RINEX 3 positioning service")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = sub.add_parser('serve', help="Run the positioning service")
+    replay_parser = sub.add_parser('replay', help="Stream a RINEX 3 observation file to the service")
+    for p in (serve_parser, replay_parser):
+        p.add_argument('--host', default='127.0.0.1')
+        p.add_argument('--port', type=int, default=9000)
+        p.add_argument('--unix', help="Unix socket path (instead of host/port)")
+    serve_parser.add_argument('--output', help="Write JSON lines to this file (default: stdout)")
+    serve_parser.add_argument('--max-latency', type=float, default=MAX_LATENCY)
+    replay_parser.add_argument('obs_file')
+    replay_parser.add_argument('--nav', help="RINEX 3 navigation file sent before the epochs")
+    replay_parser.add_argument('--speed', type=float, default=1.0, help="Replay speed factor (0: no pacing)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'replay':
+        sent = asyncio.run(replay(args.obs_file, args.nav, args.host, args.port, args.unix, args.speed))
+        print(f"Sent {sent} epochs")
+        return 0
+
+    output = open(args.output, 'a') if args.output else None
+    service = PositioningService(output, max_latency=args.max_latency)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Stats: {service.stats}", file=sys.stderr)
+        if output:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
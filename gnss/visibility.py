@@ -0,0 +1,196 @@
+"""
+Per-station satellite visibility precomputed from the broadcast orbits.
+
+A VisibilityIndex samples the elevation of every satellite on a coarse
+grid (one minute by default) over a day, once per station.  Later stages
+ask it which (satellite, epoch) pairs are above the elevation mask and
+propagate or solve only those:
+
+    visibility = VisibilityIndex(ephemerides, station_ecef, mask=10)
+    keep = visibility.visible(prns, t)
+
+Elevation changes by at most ~0.5 deg per minute for GPS/QZSS orbits, so
+linear interpolation on the grid is far more accurate than any mask needs.
+"""
+import numpy as np
+
+from gnss.cache import satellite_states
+from gnss.constants import GPS_EPOCH
+from gnss.ephemeris import EphemerisArray
+from gnss.ephemeris_index import EphemerisIndex
+from gnss.geodesy import ecef_to_az_el
+from gnss.instrument import count, stage
+
+# Default elevation mask [deg]
+ELEVATION_MASK = 10.0
+
+# Elevation grid spacing [s] and default span
+STEP_SECONDS = 60.0
+SECONDS_PER_DAY = 86400.0
+
+
+def above_mask(positions, station, mask=ELEVATION_MASK):
+    """
+    Whether satellite positions are above the elevation mask of a station.
+
+    Args:
+        positions (array_like): Satellite ECEF positions [m], shape [N, 3]
+        station (array_like): Station ECEF position [m], shape [3]
+        mask (float): Elevation mask [deg]
+
+    Returns:
+        np.ndarray: Boolean array, shape [N]
+    """
+    _, elevation, _ = ecef_to_az_el(np.asarray(positions, dtype=np.float64), np.asarray(station, dtype=np.float64))
+    return elevation >= mask
+
+
+class VisibilityIndex:
+    """
+    Elevation of every satellite on a regular time grid, seen from one station.
+    """
+
+    def __init__(self, table, station, start=None, duration=SECONDS_PER_DAY, step=STEP_SECONDS,
+                 mask=ELEVATION_MASK, index=None):
+        """
+        Propagate every satellite over the grid and store its elevation.
+
+        Args:
+            table (EphemerisArray or pd.DataFrame): Ephemerides
+            station (array_like): Station ECEF position [m], shape [3]
+            start (float, optional): Grid start in seconds since the GPS epoch
+                (default: midnight before the first Toe)
+            duration (float): Grid span [s]
+            step (float): Grid spacing [s]
+            mask (float): Default elevation mask [deg] for visible() and intervals()
+            index (EphemerisIndex, optional): Prebuilt index over table
+        """
+        table = EphemerisArray.from_table(table)
+        if index is None:
+            index = EphemerisIndex(table)
+        if start is None:
+            start = np.floor(table.toe.min() / SECONDS_PER_DAY) * SECONDS_PER_DAY
+        self.prns = index.prns
+        self.station = np.asarray(station, dtype=np.float64)
+        self.start = float(start)
+        self.step = float(step)
+        self.mask = float(mask)
+        self.times = self.start + np.arange(int(np.ceil(duration / step)) + 1) * self.step
+
+        with stage('visibility'):
+            rows = index.lookup(self.prns[None, :], self.times[:, None])
+            valid = rows >= 0
+            t = np.broadcast_to(self.times[:, None], rows.shape)[valid]
+            X, Y, Z, _ = satellite_states(table, rows[valid], t)
+            self.elevation = np.full(rows.shape, np.nan)
+            self.elevation[valid] = ecef_to_az_el(np.stack([X, Y, Z], axis=-1), self.station)[1]
+        count('visibility samples', int(valid.sum()))
+
+    def elevation_at(self, prns, t):
+        """
+        Elevation interpolated to (PRN, t) pairs.
+
+        Args:
+            prns (array_like): Satellite IDs
+            t (array_like): GPS seconds, broadcast against prns
+
+        Returns:
+            np.ndarray: Elevation [deg], NaN outside the grid or without an ephemeris
+        """
+        prns = np.asarray(prns, dtype=str)
+        t = np.asarray(t, dtype=np.float64)
+        if len(self.prns) == 0:
+            return np.full(np.broadcast(prns, t).shape, np.nan)
+        pos = np.minimum(np.searchsorted(self.prns, prns), len(self.prns) - 1)
+        known = self.prns[pos] == prns
+        t, pos, known = np.broadcast_arrays(t, pos, known)
+
+        x = (t - self.start) / self.step
+        i = np.clip(np.floor(x).astype(np.int64), 0, len(self.times) - 2)
+        f = x - i
+        elevation = (1 - f) * self.elevation[i, pos] + f * self.elevation[i + 1, pos]
+        inside = known & (x >= 0) & (x <= len(self.times) - 1)
+        return np.where(inside, elevation, np.nan)
+
+    def visible(self, prns, t, mask=None):
+        """
+        Whether each (PRN, t) pair is above the elevation mask (False when unknown).
+        """
+        mask = self.mask if mask is None else mask
+        with np.errstate(invalid='ignore'):
+            return self.elevation_at(prns, t) >= mask
+
+    def intervals(self, mask=None):
+        """
+        Rise and set times of every pass above the mask.
+
+        Crossings are interpolated linearly between grid points; passes in
+        progress at the ends of the grid start or stop there.
+
+        Args:
+            mask (float, optional): Elevation mask [deg] (default: the index's mask)
+
+        Returns:
+            dict: Satellite, Rise, Set (datetime64[ns]) and MaxElevation [deg],
+                one entry per pass, by satellite and time
+        """
+        mask = self.mask if mask is None else mask
+        elevation = np.where(np.isfinite(self.elevation), self.elevation, -90.0)
+        above = elevation >= mask
+        T, S = above.shape
+
+        # +1 where a pass starts, -1 one sample after it ends
+        edges = np.diff(np.pad(above, ((1, 1), (0, 0))).astype(np.int8), axis=0)
+        sat_rise, rise = np.nonzero(edges.T == 1)
+        sat_set, after = np.nonzero(edges.T == -1)
+
+        def crossing(before, later, sat):
+            # Time where the elevation crosses the mask between two grid samples
+            inner = (before >= 0) & (later < T)
+            b, a = np.clip(before, 0, T - 1), np.clip(later, 0, T - 1)
+            e0, e1 = elevation[b, sat], elevation[a, sat]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                f = np.clip((mask - e0) / (e1 - e0), 0.0, 1.0)
+            return np.where(inner, self.times[b] + f * (self.times[a] - self.times[b]),
+                            self.times[np.where(before < 0, a, b)])
+
+        rise_time = crossing(rise - 1, rise, sat_rise)
+        set_time = crossing(after - 1, after, sat_set)
+
+        # Highest grid elevation of every pass
+        flat = np.append(elevation.T.ravel(), -90.0)
+        bounds = np.stack([sat_rise * T + rise, sat_set * T + after], axis=-1).ravel()
+        peak = np.maximum.reduceat(flat, bounds)[::2] if len(bounds) else np.empty(0)
+
+        def as_time(seconds):
+            return GPS_EPOCH + np.round(seconds * 1e3).astype(np.int64).astype('timedelta64[ms]')
+
+        return {
+            'Satellite': self.prns[sat_rise],
+            'Rise': as_time(rise_time),
+            'Set': as_time(set_time),
+            'MaxElevation': peak,
+        }
+
+    def save(self, path):
+        """
+        Store the index as .npz, to be reopened with VisibilityIndex.load.
+        """
+        np.savez(path, prns=self.prns, station=self.station, times=self.times, elevation=self.elevation,
+                 mask=self.mask)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reopen an index stored with save() without propagating anything.
+        """
+        with np.load(path) as data:
+            self = cls.__new__(cls)
+            self.prns = data['prns']
+            self.station = data['station']
+            self.times = data['times']
+            self.elevation = data['elevation']
+            self.mask = float(data['mask'])
+        self.start = float(self.times[0])
+        self.step = float(self.times[1] - self.times[0]) if len(self.times) > 1 else STEP_SECONDS
+        return self
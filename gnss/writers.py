@@ -0,0 +1,261 @@
+"""
+Buffered batch writers for tabular results.
+
+Rows are appended as column arrays (or DataFrames) and written in whole
+chunks through a single open file, instead of one file open per row:
+
+    with BatchWriter('positions.parquet') as writer:
+        for sat, X, Y, Z in ...:
+            writer.write({'Satellite': sat, 'X': X, 'Y': Y, 'Z': Z})
+
+The format follows the file extension: .npz, .parquet and .arrow/.feather
+(Arrow IPC) for binary storage, .csv, .json and .jsonl for export.
+Parquet and Arrow require pyarrow.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from gnss.instrument import count, stage
+
+# Rows buffered before a chunk is written
+CHUNK_ROWS = 1 << 16
+
+FORMATS = {
+    '.npz': 'npz',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.csv': 'csv',
+    '.json': 'json',
+    '.jsonl': 'jsonl',
+}
+
+
+def detect_format(path):
+    """
+    Map an output path to a writer format name from its extension.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"{path}: unsupported output format (use one of {', '.join(FORMATS)})")
+    return FORMATS[ext]
+
+
+class BatchWriter:
+    """
+    Append-only table writer that buffers rows and writes them in chunks.
+
+    Text formats and the Arrow formats stream each chunk to the open file;
+    .npz cannot be appended to, so its chunks are concatenated and written
+    once on close.
+    """
+
+    def __init__(self, path, format=None, chunk_rows=CHUNK_ROWS, date_format=None):
+        """
+        Args:
+            path (str): Output file path
+            format (str, optional): 'npz', 'parquet', 'arrow', 'csv', 'json' or
+                'jsonl' (default: from the extension)
+            chunk_rows (int): Rows buffered before a chunk is written
+            date_format (str, optional): strftime format of datetime columns in
+                CSV/JSON output (default: ISO 8601)
+        """
+        self.path = path
+        self.format = format or detect_format(path)
+        self.chunk_rows = chunk_rows
+        self.date_format = date_format
+        self.rows = 0
+        self._pending = []
+        self._pending_rows = 0
+        self._chunks = []
+        self._file = None
+        self._writer = None
+
+    def write(self, columns):
+        """
+        Append rows.
+
+        Args:
+            columns (dict or pd.DataFrame): Equal-length column arrays; scalars
+                are repeated to the common length
+        """
+        if isinstance(columns, pd.DataFrame):
+            columns = {k: columns[k].to_numpy() for k in columns.columns}
+        arrays = {k: np.asarray(v) for k, v in columns.items()}
+        n = max((len(v) for v in arrays.values() if v.ndim), default=1)
+        if n == 0:
+            return
+        self._pending.append({k: np.broadcast_to(v, (n,)) if v.ndim == 0 else v for k, v in arrays.items()})
+        self._pending_rows += n
+        if self._pending_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows as one chunk.
+        """
+        if not self._pending:
+            return
+        chunk = pd.DataFrame({k: np.concatenate([p[k] for p in self._pending]) for k in self._pending[0]})
+        self._pending = []
+        self._pending_rows = 0
+        with stage('write'):
+            getattr(self, '_write_' + self.format)(chunk)
+        self.rows += len(chunk)
+        count('rows written', len(chunk))
+
+    def _text(self, chunk):
+        """
+        Format datetime columns for the text formats.
+        """
+        if self.date_format is None:
+            return chunk
+        chunk = chunk.copy()
+        for k in chunk.columns:
+            if pd.api.types.is_datetime64_any_dtype(chunk[k]):
+                chunk[k] = chunk[k].dt.strftime(self.date_format)
+        return chunk
+
+    def _json_records(self, chunk):
+        """
+        JSON text of every row, encoded column by column.
+
+        Floats are written in Python's shortest round-trip form, as json.dump
+        writes them (pandas' to_json prints a fixed number of decimals), NaN
+        as null and unformatted datetimes in ISO 8601.
+        """
+        text = self._text(chunk)
+        columns = []
+        for k in text.columns:
+            key = json.dumps(str(k)) + ':'
+            values = text[k].to_numpy()
+            if values.dtype.kind == 'f':
+                encoded = [key + (repr(v) if v == v and abs(v) != np.inf else 'null') for v in values.tolist()]
+            else:
+                # Encode each distinct value once (satellites and epochs repeat)
+                codes, uniques = pd.factorize(text[k])
+                table = [key + json.dumps(v, default=lambda v: v.isoformat()) for v in uniques.astype(object)]
+                table.append(key + 'null')  # code -1: missing
+                encoded = np.array(table, dtype=object)[codes].tolist()
+            columns.append(encoded)
+        return ['{' + ','.join(row) + '}' for row in zip(*columns)]
+
+    def _write_csv(self, chunk):
+        header = self._file is None
+        if header:
+            self._file = open(self.path, 'w', encoding='utf-8', newline='')
+        self._text(chunk).to_csv(self._file, header=header, index=False)
+
+    def _write_jsonl(self, chunk):
+        if self._file is None:
+            self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write('\n'.join(self._json_records(chunk)))
+        self._file.write('\n')
+
+    def _write_json(self, chunk):
+        # One JSON array of records, written chunk by chunk
+        records = ','.join(self._json_records(chunk))
+        if self._file is None:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write('[')
+        else:
+            self._file.write(',')
+        self._file.write(records)
+
+    def _write_npz(self, chunk):
+        self._chunks.append(chunk)
+
+    def _write_parquet(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        batch = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, batch.schema)
+        self._writer.write_table(batch)
+
+    def _write_arrow(self, chunk):
+        import pyarrow as pa
+
+        batch = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._file = pa.OSFile(self.path, 'wb')
+            self._writer = pa.ipc.new_file(self._file, batch.schema)
+        self._writer.write_table(batch)
+
+    def close(self):
+        """
+        Flush the remaining rows and finish the file.
+        """
+        self.flush()
+        if self.format == 'npz':
+            table = pd.concat(self._chunks, ignore_index=True) if self._chunks else pd.DataFrame()
+            with stage('write'):
+                np.savez(self.path, **{k: _column_array(table[k]) for k in table.columns})
+            self._chunks = []
+        if self.format == 'json':
+            if self._file is None:
+                self._file = open(self.path, 'w', encoding='utf-8')
+                self._file.write('[')
+            self._file.write(']')
+        if self.format in ('csv', 'jsonl') and self._file is None:
+            open(self.path, 'w').close()  # No rows: leave an empty file
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _column_array(column):
+    """
+    Convert a column to a NumPy array that np.savez stores without pickling.
+    """
+    array = column.to_numpy()
+    return array.astype(str) if array.dtype == object else array
+
+
+def write_table(path, columns, format=None, **kwargs):
+    """
+    Write a whole table in one call.
+
+    Args:
+        path (str): Output file path
+        columns (dict or pd.DataFrame): Column arrays
+        format (str, optional): Output format (default: from the extension)
+        **kwargs: Passed to BatchWriter
+
+    Returns:
+        int: Number of rows written
+    """
+    with BatchWriter(path, format, **kwargs) as writer:
+        writer.write(columns)
+    return writer.rows
+
+
+def read_table(path, format=None):
+    """
+    Read a table written by BatchWriter back into a DataFrame.
+    """
+    format = format or detect_format(path)
+    if format == 'npz':
+        with np.load(path) as data:
+            return pd.DataFrame({k: data[k] for k in data.files})
+    if format == 'parquet':
+        return pd.read_parquet(path)
+    if format == 'arrow':
+        return pd.read_feather(path)
+    if format == 'csv':
+        return pd.read_csv(path)
+    return pd.read_json(path, orient='records', lines=format == 'jsonl')
@@ -1,70 +1,39 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 import os
+import sys
 
-# Hàm chuyển từ Lat, Lon, Alt sang ECEF
-def geodetic_to_ecef(lat, lon, alt):
-    a = 6378137.0  # Bán kính Trái Đất (m)
-    e2 = 6.69437999014e-3  # Độ dẹt bình phương
-    lat, lon = np.radians(lat), np.radians(lon)
-
-    N = a / np.sqrt(1 - e2 * np.sin(lat) ** 2)
-    X = (N + alt) * np.cos(lat) * np.cos(lon)
-    Y = (N + alt) * np.cos(lat) * np.sin(lon)
-    Z = ((1 - e2) * N + alt) * np.sin(lat)
-    return X, Y, Z
+import pandas as pd
 
-# Hàm chuyển từ ECEF sang ENU
-def ecef_to_enu(x, y, z, x_ref, y_ref, z_ref, lat_ref, lon_ref):
-    lat_ref, lon_ref = np.radians(lat_ref), np.radians(lon_ref)
-    
-    dx, dy, dz = x - x_ref, y - y_ref, z - z_ref
-    enu_matrix = np.array([
-        [-np.sin(lon_ref), np.cos(lon_ref), 0],
-        [-np.sin(lat_ref)*np.cos(lon_ref), -np.sin(lat_ref)*np.sin(lon_ref), np.cos(lat_ref)],
-        [np.cos(lat_ref)*np.cos(lon_ref), np.cos(lat_ref)*np.sin(lon_ref), np.sin(lat_ref)]
-    ])
-    
-    enu_coords = np.dot(enu_matrix, np.array([dx, dy, dz]))
-    return enu_coords[0], enu_coords[1], enu_coords[2]
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gnss.instrument import Instrument
+from gnss.render import chart, render, satellite_charts
 
 # Đọc dữ liệu từ file CSV
 file_path = "../data/satellite_coordinates_v4.csv"  # Thay bằng đường dẫn thực tế
-df = pd.read_csv(file_path)
 
 # Chọn điểm tham chiếu (VD: Hà Nội, Việt Nam)
-lat_ref, lon_ref, alt_ref = 21.0285, 105.8542, 10  # Hà Nội (21.0285°N, 105.8542°E, 10m)
-
-# Chuyển đổi điểm tham chiếu sang ECEF
-x_ref, y_ref, z_ref = geodetic_to_ecef(lat_ref, lon_ref, alt_ref)
-
-# Chuyển tất cả tọa độ vệ tinh từ ECEF → ENU
-df["E"], df["N"], df["U"] = zip(*df.apply(lambda row: ecef_to_enu(row["x"], row["y"], row["z"], x_ref, y_ref, z_ref, lat_ref, lon_ref), axis=1))
-
-# Tạo thư mục lưu ảnh
-output_dir = "sat_plots"
-os.makedirs(output_dir, exist_ok=True)
+station = (21.0285, 105.8542, 10)  # Hà Nội (21.0285°N, 105.8542°E, 10m)
 
-# Vẽ tất cả quỹ đạo vệ tinh trong hệ tọa độ ENU
-fig = plt.figure(figsize=(8, 6))
-ax = fig.add_subplot(111, projection='3d')
+# Thư mục lưu ảnh: ảnh từng vệ tinh tách riêng khỏi sat_plots/ (bản đồ quỹ đạo QZSSxx.png)
+output_dir = "enu_plots"
+all_image = os.path.join("sat_plots", "all_satellites_enu.png")
 
-for satellite, group in df.groupby("Satellite"):
-    ax.plot(group["E"], group["N"], group["U"], marker="o", linestyle="-", label=satellite)
+# Số tiến trình vẽ song song (None: theo số CPU)
+jobs = None
 
-# Đặt tên trục
-ax.set_xlabel("East (m)")
-ax.set_ylabel("North (m)")
-ax.set_zlabel("Up (m)")
-ax.set_title("Satellite Orbits in ENU Coordinate System")
+def main():
+    df = pd.read_csv(file_path)
 
-# Hiển thị chú thích
-ax.legend()
+    # Quỹ đạo ENU của từng vệ tinh (enu_plots/QZSS01.png, ...) và của tất cả vệ tinh,
+    # vẽ song song; ảnh có dữ liệu không đổi so với lần vẽ trước được bỏ qua
+    positions = df[["x", "y", "z"]].to_numpy()
+    charts = satellite_charts("enu", positions, df["Satellite"], output_dir, station)
+    charts.append(chart("enu", all_image, positions, df["Satellite"], station))
+    rendered, skipped = render(charts, jobs)
 
-# Lưu ảnh vào thư mục
-output_image = os.path.join(output_dir, "all_satellites_enu.png")
-plt.savefig(output_image, dpi=300)  # Lưu ảnh với độ phân giải cao
-plt.close(fig)
+    print(f"Đã lưu {len(rendered)} ảnh quỹ đạo trong hệ ENU vào {output_dir} và {all_image} "
+          f"({len(skipped)} ảnh không đổi)")
 
-print(f"Đã lưu ảnh quỹ đạo trong hệ ENU: {output_image}")
+if __name__ == "__main__":
+    with Instrument('plot_neu') as instrument:
+        main()
+    print(instrument.summary())
@@ -1,81 +1,40 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib import cm
 import os
+import sys
 
-# Hàm chuyển đổi từ ECEF (x, y, z) sang Azimuth và Elevation
-def ecef_to_az_el(x, y, z):
-    # Tọa độ của người quan sát (x = 0, y = 0, z = 0 tức là ở trung tâm Trái Đất)
-    observer_x = 0
-    observer_y = 0
-    observer_z = 0
-
-    # Tính toán sự khác biệt giữa tọa độ vệ tinh và người quan sát
-    dx = x - observer_x
-    dy = y - observer_y
-    dz = z - observer_z
-
-    # Tính toán khoảng cách từ vệ tinh đến người quan sát
-    r = np.sqrt(dx**2 + dy**2 + dz**2)
+import pandas as pd
 
-    # Tính toán góc Elevation (góc với trục z)
-    elevation = np.arcsin(dz / r)
-    
-    # Tính toán góc Azimuth (góc trong mặt phẳng xy)
-    azimuth = np.arctan2(dy, dx)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gnss.geodesy import geodetic_to_ecef
+from gnss.render import chart, render
+from gnss.visibility import above_mask
 
-    # Chuyển đổi sang độ
-    elevation = np.degrees(elevation)
-    azimuth = np.degrees(azimuth)
+# Vị trí trạm quan sát (VD: Hà Nội, Việt Nam)
+station = (21.0285, 105.8542, 10)  # Hà Nội (21.0285°N, 105.8542°E, 10m)
 
-    return azimuth, elevation
+# Góc ngưỡng (elevation mask, độ): chỉ vẽ các điểm vệ tinh nằm trên ngưỡng này
+elevation_mask = 0.0
 
 # Đọc dữ liệu từ file CSV
 file_path = "../data/satellite_coordinates_v4.csv"  # Đường dẫn file CSV của bạn
-df = pd.read_csv(file_path)
-
-# Khởi tạo danh sách lưu các tọa độ Azimuth và Elevation
-azimuths = []
-elevations = []
-satellite_ids = []
-
-# Chuyển đổi tất cả các tọa độ ECEF sang Azimuth, Elevation
-for index, row in df.iterrows():
-    x, y, z = row['x'], row['y'], row['z']
-    azimuth, elevation = ecef_to_az_el(x, y, z)
-    azimuths.append(azimuth)
-    elevations.append(elevation)
-    satellite_ids.append(row['Satellite'])
-
-# Vẽ sky-satellite plot với yếu tố đặc trưng của QZSS
-fig, ax = plt.subplots(figsize=(8, 8))
-ax.set_aspect('equal')
-
-# Vẽ các vệ tinh theo góc Azimuth và Elevation
-scatter = ax.scatter(azimuths, elevations, c=elevations, cmap=cm.viridis, s=20, alpha=0.7)
+output_dir = "sky_sat_plots"
 
-# Phân loại vệ tinh QZSS (theo tên hoặc mã)
-for i, sat_id in enumerate(satellite_ids):
-    if "QZSS" in sat_id:
-        ax.text(azimuths[i], elevations[i], sat_id, fontsize=8, color='red', ha='center')
+def main():
+    df = pd.read_csv(file_path)
 
-# Thiết lập giới hạn và tiêu đề
-ax.set_xlim(-180, 180)
-ax.set_ylim(-90, 90)
-ax.set_xlabel("Azimuth (degrees)")
-ax.set_ylabel("Elevation (degrees)")
-ax.set_title("Sky-Satellite Plot - QZSS System")
+    # Bỏ các điểm vệ tinh nằm dưới đường chân trời (hoặc dưới góc ngưỡng)
+    visible = above_mask(df[['x', 'y', 'z']].to_numpy(), geodetic_to_ecef(*station), elevation_mask)
+    print(f"{visible.sum()}/{len(df)} điểm nằm trên góc ngưỡng {elevation_mask}°")
+    df = df[visible]
 
-# Thêm thanh màu sắc
-cbar = plt.colorbar(scatter, ax=ax)
-cbar.set_label("Elevation (degrees)")
+    # Vẽ sky-satellite plot (Azimuth, Elevation nhìn từ trạm) với yếu tố đặc trưng của QZSS
+    # và lưu ảnh (bỏ qua nếu dữ liệu không đổi so với lần vẽ trước)
+    output_image = os.path.join(output_dir, "sky_satellite_qzss_plot.png")
+    rendered, _ = render([chart('sky', output_image, df[['x', 'y', 'z']].to_numpy(), df['Satellite'], station)])
 
-# Lưu ảnh vào thư mục
-output_dir = "sky_sat_plots"
-os.makedirs(output_dir, exist_ok=True)
-output_image = os.path.join(output_dir, "sky_satellite_qzss_plot.png")
-plt.savefig(output_image, dpi=300)  # Lưu ảnh với độ phân giải cao
-plt.close(fig)  # Đóng figure để tiết kiệm bộ nhớ
+    if rendered:
+        print(f"Đã lưu ảnh sky-satellite plot với QZSS: {output_image}")
+    else:
+        print(f"Dữ liệu không đổi, giữ nguyên ảnh: {output_image}")
 
-print(f"Đã lưu ảnh sky-satellite plot với QZSS: {output_image}")
+if __name__ == "__main__":
+    main()
@@ -1,127 +1,70 @@
-import re
 import os
-import csv
-from datetime import datetime
-from collections import defaultdict
-from pathlib import Path
-from typing import List
+import sys
+
 import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gnss import cycle_slip
+from gnss.instrument import Instrument
+from gnss.rinex_obs import ObsEpoch, read_header, iter_epochs_v2, stack_epochs
 
 # Input and output file paths
 rinex_file = r"../data/roap1810.09o"
 
+# Print every observation (slow on whole-day files); otherwise only a summary
+VERBOSE = False
+
 def scan_header(file):
     """
     Scan RINEX header and extract relevant information.
-    
+
     Args:
         file (str): Path to the RINEX file
-    
+
     Returns:
-        dict: Dictionary containing relevant header information
+        tuple: Dictionary containing relevant header information, list of observation types
     """
-    header = defaultdict(str)
-    types_of_obs = []
     with open(file, 'r') as f:
-        for line in f:
-            if "END OF HEADER" in line:
-                break
-            elif "RINEX VERSION / TYPE" in line:
-                header['version'] = float(line.split()[0])
-                header['filetype'] = re.split(r'\s{2,}', line.strip())[1]
-                header['satellite'] = re.split(r'\s{2,}', line.strip())[2]
-            elif "# / TYPES OF OBSERV" in line:
-                parts = line.split("# / TYPES OF OBSERV")[0].split()
-                header["num_obs"] = int(parts[0])  # Number of observation types
-                types_of_obs = parts[1:]  # List of observation types
-            elif "APPROX POSITION XYZ" in line:
-                header['position'] = [float(line[:14]), float(line[14:28]), float(line[28:42])]
-            elif "TIME OF FIRST OBS" in line:
-                header['first_obs'] = [int(line[:6]), int(line[6:12]), int(line[12:18]), int(line[18:24]), int(line[24:30]), float(line[30:43])]
-            elif "TIME OF LAST OBS" in line:
-                header['last_obs'] = [int(line[:6]), int(line[6:12]), int(line[12:18]), int(line[18:24]), int(line[24:30]), float(line[30:43])]
-            elif "INTERVAL" in line:
-                header['interval'] = float(line[:10])
-    return header, types_of_obs
-
-header, types_of_obs = scan_header(rinex_file)
-# Get the indices of C1 and L1 from observation types
-try:
-    idx_c1 = types_of_obs.index("C1")
-    idx_l1 = types_of_obs.index("L1")
-except ValueError:
-    print("Cannot find L1 or C1 index in TYPES OF OBSERV")
-    exit()
+        header = read_header(f)
+    return header, header['obs_types']
 
-def _obstime(fol: List[str]) -> datetime:
-    """
-    Python >= 3.7 supports nanoseconds.  https://www.python.org/dev/peps/pep-0564/
-    Python < 3.7 supports microseconds.
+def scan_obs_data(file):
     """
-    year = int(fol[0])
-    if 80 <= year <= 99:
-        year += 1900
-    elif year < 80:  # because we might pass in four-digit year
-        year += 2000
+    Stream C1/L1 observations epoch by epoch.
 
-    return datetime(year=year, month=int(fol[1]), day=int(fol[2]),
-                    hour=int(fol[3]), minute=int(fol[4]),
-                    second=int(float(fol[5])),
-                    microsecond=int(float(fol[5]) % 1 * 1000000)
-                    )
-    
-def extract_satellite_list(sat_list):
-    """
-    Extract satellite list from the Epoch line.
-    
     Args:
-        sat_list (str): String containing satellite data
-    
+        file (str): Path to the RINEX 2.11 observation file
+
     Returns:
-        list: List of satellites in the format "G+number"
+        generator: (epoch, prns, c1, l1) per epoch, with NumPy arrays for PRNs and values
     """
-    sat_list_cleaned = re.sub(r'\s+', '', sat_list)
-    satellites = re.findall(r'G\d+', sat_list_cleaned)
-    return satellites
+    with open(file, 'r') as f:
+        header = read_header(f)
+        for epoch in iter_epochs_v2(f, header, obs_types=["C1", "L1"]):
+            yield epoch.time, epoch.prns, epoch.obs[:, 0], epoch.obs[:, 1]
 
-def parse_observation_line(line, num_obs):
-    obs_values = []
-    for i in range(num_obs):
-        raw_value = line[i * 16 : i * 16 + 14].strip()  # Take only the first 14 character data
-        if raw_value:  # If the data column is not blank
-            try:
-                # Try converting the raw value to float, skip non-numeric values
-                obs_values.append(float(raw_value))
-            except ValueError:
-                # If it's not numeric (like satellite ID), append None
-                obs_values.append(None)
-        else:
-            obs_values.append(None)
-    return obs_values
+def main():
+    header, types_of_obs = scan_header(rinex_file)
+    # Check that C1 and L1 are in the observation types
+    if "C1" not in types_of_obs or "L1" not in types_of_obs:
+        print("Cannot find L1 or C1 index in TYPES OF OBSERV")
+        return
 
-def scan_obs_data(file):
-    with open(file, 'r') as f:
-        for line in f:
-            if "END OF HEADER" in line:
-                break
-        
-        for line in f:
-            if re.match(r"^\s*\d{1,4}\s+\d+\s+\d+\s+\d+\s+\d+\s+\d+\.\d+\s+\d+", line):
-                epoch = _obstime([line[1:3], line[4:6], line[7:9], line[10:12], line[13:15], line[16:26]])
-                num_of_sat = int(line[29:32])
-                satellites = extract_satellite_list(line[32:])
-            for _ in range(num_of_sat):
-                line = f.readline()
-                if not line:
-                    break
-                 # Process satellite observation data
-                obs_values = parse_observation_line(line, len(types_of_obs))  # Parse correctly
-                prn = satellites[_]
-                c1 = obs_values[idx_c1]
-                l1 = obs_values[idx_l1]
-                print(f"Epoch: {epoch}, PRN: {prn}, C1: {c1}, L1: {l1}")
-                
-    return None
+    with Instrument('rinex_o_2.11') as instrument:
+        epochs = []
+        for epoch, prns, c1, l1 in scan_obs_data(rinex_file):
+            epochs.append(ObsEpoch(epoch, 0, prns, np.column_stack([c1, l1])))
+            if VERBOSE:
+                for prn, c1_value, l1_value in zip(prns, c1, l1):
+                    print(f"Epoch: {epoch}, PRN: {prn}, C1: {c1_value}, L1: {l1_value}")
+
+        # Cycle slips and continuous carrier-phase arcs over the whole file
+        times, prns, obs = stack_epochs(epochs)
+        result = cycle_slip.detect(times, obs[:, :, 0], obs[:, :, 1])
+        print(f"{result.slip.sum()} cycle slips, {result.gap.sum()} gaps, {len(result.arc_start)} arcs")
+        print(pd.DataFrame(cycle_slip.arc_table(result, times, prns)).to_string(index=False))
+    print(instrument.summary())
 
-scan_obs_data(rinex_file)
-# Output:
+if __name__ == "__main__":
+    main()
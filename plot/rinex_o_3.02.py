@@ -1,16 +1,20 @@
 import re
-import json
-from datetime import datetime
+import os
+import sys
 from collections import defaultdict
 
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gnss import cycle_slip
+from gnss.obs_cube import build_cube
+from gnss.rinex_obs import read_header, iter_epochs_v3
+from gnss.writers import BatchWriter
+
 rinex_file = r"../data/GPS_obs_3_02.rnx"
 json_output = r"../data/output.json"
-
-def _obstime(fol):
-    return datetime(year=int(fol[0]), month=int(fol[1]), day=int(fol[2]),
-                    hour=int(fol[3]), minute=int(fol[4]),
-                    second=int(float(fol[5])),
-                    microsecond=int(float(fol[5]) % 1 * 1000000))
+cube_output = r"../data/GPS_obs_3_02.cube"
 
 def scan_header(file):
     with open(file, 'r') as f:
@@ -35,52 +39,61 @@ def scan_header(file):
                 break
     return header 
 
-header = scan_header(rinex_file)
-try:
-    idx_c1 = header['type_of_obs'].index("C1C") #pseudorange
-    idx_l1 = header['type_of_obs'].index("L1C") #carrier phase
-except ValueError:
-    print("Cannot find L1C or C1C index in TYPES OF OBSERV")
-    exit()
+def scan_body(file, output_file, select=None):
+    """
+    Extract C1C/L1C for every satellite (or those accepted by select) and save them as a table.
 
-def scan_body(file, output_json):
-    data = []
-    
-    with open(file, 'r') as f:
-        for line in f:
-            if "END OF HEADER " in line:
-                break
-        
-        for line in f:
-            if ">" in line:
-                epoch = _obstime([line[2:6], line[7:9], line[10:12], line[13:15], line[16:18], line[19:29]])
-                num_of_sats_in_epoch = int(line[33:35]) 
-                for _ in range(num_of_sats_in_epoch):
-                    line = f.readline()
-                    prn = line[0:3].strip()
-                    if prn != "G05":
-                        continue
-                    
-                    try:
-                        C1C = float(line[4 + idx_c1 * 16: 4 + idx_c1 * 16 + 14].strip())
-                    except ValueError:
-                        C1C = None
-                    
-                    try:
-                        L1C = float(line[4 + idx_l1 * 16: 4 + idx_l1 * 16 + 14].strip())
-                    except ValueError:
-                        L1C = None
-                    
-                    data.append({
-                        "Satellite": prn,
-                        "Epoch Time": epoch.strftime('%Y-%m-%d %H:%M:%S.%f'),
-                        "C1C": C1C,
-                        "L1C": L1C
-                    })
+    Args:
+        file (str): Path to the RINEX 3 observation file
+        output_file (str): Output path; the extension selects the format
+            (.json, .csv, .parquet, .arrow, .npz, see gnss.writers)
+        select (callable, optional): Predicate on the PRN, e.g. ``lambda prn: prn == "G05"``
+    """
+    with open(file, 'r') as f, BatchWriter(output_file, date_format='%Y-%m-%d %H:%M:%S.%f') as writer:
+        header = read_header(f)
+        for epoch in iter_epochs_v3(f, header, ["C1C", "L1C"], select=select):
+            writer.write({
+                "Satellite": epoch.prns,
+                "Epoch Time": np.full(len(epoch.prns), epoch.time),
+                "C1C": epoch.obs[:, 0],  # NaN -> null in JSON
+                "L1C": epoch.obs[:, 1]
+            })
     
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
-    
-    print(f"Data saved to {output_json}")
+    print(f"Data saved to {output_file}")
+
+def save_cube(file, output_dir, select=None):
+    """
+    Save every observation type as a memory-mapped [epoch x satellite x obs-type] cube.
+
+    Load it back with ``gnss.obs_cube.load_cube(output_dir)`` and slice a
+    whole-file series with ``cube.series("G05", "C1C")``.
+
+    Args:
+        file (str): Path to the RINEX 3 observation file
+        output_dir (str): Path to the output cube directory
+        select (callable, optional): Predicate on the PRN, e.g. ``lambda prn: prn == "G05"``
+    """
+    cube = build_cube(file, output_dir, select=select)
+    print(f"Data saved to {output_dir} ({cube.shape[0]} epochs x {cube.shape[1]} satellites x {cube.shape[2]} types)")
+    return cube
+
+def print_arcs(cube):
+    """
+    Detect C1C/L1C cycle slips over the whole cube and print the continuous arcs.
+    """
+    result = cycle_slip.detect_cube(cube, "C1C", "L1C")
+    print(f"{result.slip.sum()} cycle slips, {result.gap.sum()} gaps, {len(result.arc_start)} arcs")
+    print(pd.DataFrame(cycle_slip.arc_table(result, cube.times, cube.prns)).to_string(index=False))
+
+def main():
+    header = scan_header(rinex_file)
+    if "C1C" not in header['type_of_obs'] or "L1C" not in header['type_of_obs']:
+        print("Cannot find L1C or C1C index in TYPES OF OBSERV")
+        return
+    scan_body(rinex_file, json_output)
+    cube = save_cube(rinex_file, cube_output)
+    print_arcs(cube)
+
+if __name__ == "__main__":
+    main()
 
-scan_body(rinex_file, json_output)